@@ -19,8 +19,22 @@ import sqlite3
 import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import fields
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    TypeVar,
+    Union,
+)
 
 from ._consts import HEADER_CONTENT_ENCODING, HEADER_OTA_FILE_CACHE_CONTROL
 from .config import config as cfg
@@ -31,6 +45,11 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# RETURNING clause is available since sqlite3 3.35.0
+SQLITE_RETURNING_SUPPORTED = sqlite3.sqlite_version_info >= (3, 35, 0)
+
 
 class CacheMeta(ORMBase):
     """revision 4
@@ -89,14 +108,80 @@ class CacheMeta(ORMBase):
 
 class OTACacheDB:
     TABLE_NAME: str = cfg.TABLE_NAME
+    # pre-resolved column names used in queries
+    FILE_SHA256_FN: str = CacheMeta.file_sha256.name
+    BUCKET_IDX_FN: str = CacheMeta.bucket_idx.name
+    LAST_ACCESS_FN: str = CacheMeta.last_access.name
+    # column descriptors of CacheMeta, for validating the input field descriptor
+    CACHE_META_COLUMNS: FrozenSet[ColumnDescriptor] = frozenset(
+        getattr(CacheMeta, _field.name) for _field in fields(CacheMeta)
+    )
+    BUCKET_LAST_ACCESS_IDX: str = f"bucket_last_access_idx_{TABLE_NAME}"
     OTA_CACHE_IDX: List[str] = [
         (
             "CREATE INDEX IF NOT EXISTS "
-            f"bucket_last_access_idx_{TABLE_NAME} "
-            f"ON {TABLE_NAME}({CacheMeta.bucket_idx.name}, {CacheMeta.last_access.name})"
+            f"{BUCKET_LAST_ACCESS_IDX} "
+            f"ON {TABLE_NAME}({BUCKET_IDX_FN}, {LAST_ACCESS_FN})"
         ),
     ]
 
+    # max num of host parameters in one query is 999 for sqlite3 < 3.32
+    REMOVE_ENTRIES_BATCH_SIZE: int = 512
+
+    # pre-compiled query statements
+    INSERT_STMT: str = (
+        f"INSERT OR REPLACE INTO {TABLE_NAME} VALUES ({CacheMeta.get_shape()})"
+    )
+    LOOKUP_ALL_STMT: str = f"SELECT * FROM {TABLE_NAME}"
+    # per-column lookup and last_access updating statements for lookup_entry
+    LOOKUP_STMTS: Dict[ColumnDescriptor, str] = {
+        _fd: f"SELECT * FROM {cfg.TABLE_NAME} WHERE {_fd.name}=?"
+        for _fd in CACHE_META_COLUMNS
+    }
+    UPDATE_LAST_ACCESS_STMTS: Dict[ColumnDescriptor, str] = {
+        _fd: (
+            f"UPDATE {cfg.TABLE_NAME} SET {CacheMeta.last_access.name}=? "
+            f"WHERE {_fd.name}=?"
+        )
+        for _fd in CACHE_META_COLUMNS
+    }
+    UPDATE_LAST_ACCESS_RETURNING_STMTS: Dict[ColumnDescriptor, str] = {
+        _fd: f"{_stmt} RETURNING *" for _fd, _stmt in UPDATE_LAST_ACCESS_STMTS.items()
+    }
+    # NOTE: the trailing sub-query checks whether the bucket holds
+    #   at least <num> entries, if not, nothing will be deleted.
+    ROTATE_STMT: str = (
+        f"DELETE FROM {TABLE_NAME} "
+        "WHERE rowid IN ("
+        f"SELECT rowid FROM {TABLE_NAME} "
+        f"WHERE {BUCKET_IDX_FN}=? "
+        f"ORDER BY {LAST_ACCESS_FN} "
+        "LIMIT ?"
+        ") AND ("
+        "SELECT COUNT(*) FROM ("
+        f"SELECT 1 FROM {TABLE_NAME} WHERE {BUCKET_IDX_FN}=? LIMIT ?"
+        ")"
+        ") >= ? "
+        f"RETURNING {FILE_SHA256_FN}"
+    )
+    # for sqlite3 < 3.35 that doesn't support RETURNING clause
+    ROTATE_COUNT_STMT: str = (
+        f"SELECT COUNT(*) FROM {TABLE_NAME} WHERE {BUCKET_IDX_FN}=? "
+        f"ORDER BY {LAST_ACCESS_FN} LIMIT ?"
+    )
+    ROTATE_SELECT_STMT: str = (
+        f"SELECT * FROM {TABLE_NAME} "
+        f"WHERE {BUCKET_IDX_FN}=? "
+        f"ORDER BY {LAST_ACCESS_FN} "
+        "LIMIT ?"
+    )
+    ROTATE_DELETE_STMT: str = (
+        f"DELETE FROM {TABLE_NAME} "
+        f"WHERE {BUCKET_IDX_FN}=? "
+        f"ORDER BY {LAST_ACCESS_FN} "
+        "LIMIT ?"
+    )
+
     @classmethod
     def check_db_file(cls, db_file: Union[str, Path]) -> bool:
         if not Path(db_file).is_file():
@@ -119,6 +204,60 @@ class OTACacheDB:
             logger.warning(f"{db_file} is corrupted: {e!r}")
             return False
 
+    @classmethod
+    def _verify_index_usage(cls, con: sqlite3.Connection) -> bool:
+        """Check whether the LRU cache rotating queries use the expected index.
+
+        The rotating queries should walk the bucket_last_access index in order,
+        instead of sorting all the entries in the bucket.
+        A warning will be logged if the expected query plan is not used.
+        NOTE: this is only a diagnostic, failing to get the query plan
+            doesn't affect the validity of the db file.
+        """
+        _stmt = (
+            cls.ROTATE_STMT if SQLITE_RETURNING_SUPPORTED else cls.ROTATE_SELECT_STMT
+        )
+        try:
+            _plan = "; ".join(
+                row[-1]
+                for row in con.execute(
+                    f"EXPLAIN QUERY PLAN {_stmt}", (0,) * _stmt.count("?")
+                )
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"failed to get the query plan of cache rotating: {e!r}")
+            return False
+        if cls.BUCKET_LAST_ACCESS_IDX not in _plan or "TEMP B-TREE" in _plan:
+            logger.warning(
+                f"{cls.BUCKET_LAST_ACCESS_IDX} is not used as expected: {_plan=}"
+            )
+            return False
+        return True
+
+    @staticmethod
+    def _apply_pragmas(con: sqlite3.Connection):
+        """Apply db performance tunning PRAGMAs to <con>.
+
+        NOTE: except journal_mode, all the following PRAGMAs are per-connection
+            settings, so they must be applied to every newly opened connection.
+        """
+        # enable WAL mode
+        con.execute("PRAGMA journal_mode = WAL;")
+        # it is safe to use NORMAL synchronous mode with WAL mode
+        con.execute("PRAGMA synchronous = NORMAL;")
+        # set temp_store to memory
+        con.execute("PRAGMA temp_store = memory;")
+        # enable mmap (size in bytes)
+        mmap_size = 256 * 1024 * 1024  # 256MiB
+        con.execute(f"PRAGMA mmap_size = {mmap_size};")
+        # page cache size, negative value means size in KiB
+        cache_size = 64 * 1024  # 64MiB
+        con.execute(f"PRAGMA cache_size = -{cache_size};")
+        # checkpoint the WAL file when it reaches 1000 pages
+        con.execute("PRAGMA wal_autocheckpoint = 1000;")
+        # wait for at most 3 seconds when the db is locked (in milliseconds)
+        con.execute("PRAGMA busy_timeout = 3000;")
+
     @classmethod
     def init_db_file(cls, db_file: Union[str, Path]):
         """
@@ -135,22 +274,24 @@ class OTACacheDB:
                     con.execute(idx, ())
 
                 ### db performance tunning
-                # enable WAL mode
-                con.execute("PRAGMA journal_mode = WAL;")
-                # set temp_store to memory
-                con.execute("PRAGMA temp_store = memory;")
-                # enable mmap (size in bytes)
-                mmap_size = 16 * 1024 * 1024  # 16MiB
-                con.execute(f"PRAGMA mmap_size = {mmap_size};")
+                cls._apply_pragmas(con)
         except sqlite3.Error as e:
             logger.debug(f"init db failed: {e!r}")
             raise e
 
-    def __init__(self, db_file: Union[str, Path]):
+    def __init__(
+        self,
+        db_file: Union[str, Path],
+        *,
+        check_db: bool = True,
+        check_same_thread: bool = True,
+    ):
         """Connects to OTA cache database.
 
         Args:
             db_file: target db file to connect to.
+            check_db: validate the db file with check_db_file before use.
+            check_same_thread: passed through to sqlite3.connect.
 
         Raises:
             ValueError on invalid ota_cache db file,
@@ -158,22 +299,17 @@ class OTACacheDB:
         """
         self._con = sqlite3.connect(
             db_file,
-            check_same_thread=True,  # one thread per connection in the threadpool
-            # isolation_level=None,  # enable autocommit mode
+            check_same_thread=check_same_thread,
+            # enable autocommit mode, transactions are controlled explicitly
+            isolation_level=None,
         )
         self._con.row_factory = sqlite3.Row
-        if not self.check_db_file(db_file):
+        if check_db and not self.check_db_file(db_file):
             raise ValueError(f"invalid db file: {db_file}")
 
         # db performance tunning, enable optimization
-        with self._con as con:
-            # enable WAL mode
-            con.execute("PRAGMA journal_mode = WAL;")
-            # set temp_store to memory
-            con.execute("PRAGMA temp_store = memory;")
-            # enable mmap (size in bytes)
-            mmap_size = 16 * 1024 * 1024  # 16MiB
-            con.execute(f"PRAGMA mmap_size = {mmap_size};")
+        self._apply_pragmas(self._con)
+        self._verify_index_usage(self._con)
 
     def __enter__(self):
         return self
@@ -185,6 +321,25 @@ class OTACacheDB:
     def close(self):
         self._con.close()
 
+    def checkpoint(self):
+        """Checkpoint the WAL file into the db file and truncate the WAL file."""
+        self._con.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+
+    @contextmanager
+    def _txn(self) -> Generator[sqlite3.Connection, None, None]:
+        """Execute multiple write queries within one transaction.
+
+        NOTE: as connection is in autocommit mode, single query doesn't need this.
+        """
+        con = self._con
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            yield con
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("COMMIT")
+
     def remove_entries(self, fd: ColumnDescriptor[FV], *_inputs: FV) -> int:
         """Remove entri(es) indicated by field(s).
 
@@ -197,13 +352,18 @@ class OTACacheDB:
         """
         if not _inputs:
             return 0
-        if CacheMeta.contains_field(fd):
-            with self._con as con:
-                _regulated_input = [(i,) for i in _inputs]
-                return con.executemany(
-                    f"DELETE FROM {self.TABLE_NAME} WHERE {fd._field_name}=?",
-                    _regulated_input,
-                ).rowcount
+        if fd in self.CACHE_META_COLUMNS:
+            _removed, _batch_size = 0, self.REMOVE_ENTRIES_BATCH_SIZE
+            _stmt_prefix = f"DELETE FROM {self.TABLE_NAME} WHERE {fd.name} IN "
+            # delete the entries in batch with IN clause, all in one transaction
+            with self._txn() as con:
+                _execute = con.execute
+                for _idx in range(0, len(_inputs), _batch_size):
+                    _batch = _inputs[_idx : _idx + _batch_size]
+                    _removed += _execute(
+                        f"{_stmt_prefix}({','.join(['?'] * len(_batch))})", _batch
+                    ).rowcount
+            return _removed
         else:
             logger.debug(f"invalid inputs detected: {_inputs=}")
             return 0
@@ -217,6 +377,7 @@ class OTACacheDB:
 
         NOTE: lookup via this method will trigger update to <last_access> field,
         NOTE 2: <last_access> field is updated by searching <fd> key.
+        NOTE 3: with sqlite3 >= 3.35, the returned entry has the updated <last_access>.
 
         Args:
             fd: field descriptor of the column.
@@ -225,25 +386,25 @@ class OTACacheDB:
         Returns:
             An instance of CacheMeta representing the cache entry, or None if lookup failed.
         """
-        if not CacheMeta.contains_field(fd):
+        if fd not in self.CACHE_META_COLUMNS:
             return
 
-        fd_name = fd.name
-        with self._con as con:  # put the lookup and update into one session
-            if row := con.execute(
-                f"SELECT * FROM {self.TABLE_NAME} WHERE {fd_name}=?",
-                (value,),
-            ).fetchone():
-                # warm up the cache(update last_access timestamp) here
-                res = CacheMeta.row_to_meta(row)
-                con.execute(
-                    (
-                        f"UPDATE {self.TABLE_NAME} SET {CacheMeta.last_access.name}=? "
-                        f"WHERE {fd_name}=?"
-                    ),
-                    (int(time.time()), value),
-                )
-                return res
+        if SQLITE_RETURNING_SUPPORTED:
+            # lookup and warm up the cache(update last_access timestamp) in one query
+            if _rows := self._con.execute(
+                self.UPDATE_LAST_ACCESS_RETURNING_STMTS[fd], (int(time.time()), value)
+            ).fetchall():
+                return CacheMeta.row_to_meta(_rows[0])
+            return
+
+        # NOTE: only take the write lock when the entry is presented,
+        #   a lookup miss is served by the plain SELECT.
+        if row := self._con.execute(self.LOOKUP_STMTS[fd], (value,)).fetchone():
+            # warm up the cache(update last_access timestamp) here
+            self._con.execute(
+                self.UPDATE_LAST_ACCESS_STMTS[fd], (int(time.time()), value)
+            )
+            return CacheMeta.row_to_meta(row)
 
     def insert_entry(self, *cache_meta: CacheMeta) -> int:
         """Insert an entry into the ota cache table.
@@ -256,21 +417,45 @@ class OTACacheDB:
         """
         if not cache_meta:
             return 0
-        with self._con as con:
+        with self._txn() as con:
             return con.executemany(
-                f"INSERT OR REPLACE INTO {self.TABLE_NAME} VALUES ({CacheMeta.get_shape()})",
-                [m.astuple() for m in cache_meta],
+                self.INSERT_STMT, [m.astuple() for m in cache_meta]
             ).rowcount
 
+    def bulk_insert(
+        self, cache_metas: Iterable[CacheMeta], chunk_size: int = 1000
+    ) -> int:
+        """Insert entries into the ota cache table in chunks.
+
+        Each chunk of entries is committed within one transaction.
+
+        Args:
+            cache_metas: an iterable of CacheMeta instances to be inserted.
+            chunk_size: max num of entries to be committed in one transaction.
+
+        Returns:
+            Returns inserted rows count.
+        """
+        _inserted, _metas = 0, iter(cache_metas)
+        while _chunk := list(islice(_metas, chunk_size)):
+            with self._txn() as con:
+                _inserted += con.executemany(
+                    self.INSERT_STMT, [m.astuple() for m in _chunk]
+                ).rowcount
+        return _inserted
+
     def lookup_all(self) -> List[CacheMeta]:
         """Lookup all entries in the ota cache table.
 
         Returns:
             A list of CacheMeta instances representing each entry.
         """
-        with self._con as con:
-            cur = con.execute(f"SELECT * FROM {self.TABLE_NAME}", ())
-            return [CacheMeta.row_to_meta(row) for row in cur.fetchall()]
+        cur = self._con.cursor()
+        # NOTE: use plain tuple as row for bulk lookup to save the overhead of
+        #   sqlite3.Row, only set on this cursor to not affect the connection.
+        cur.row_factory = None
+        cur.execute(self.LOOKUP_ALL_STMT, ())
+        return [CacheMeta.row_to_meta(row) for row in cur.fetchall()]
 
     def rotate_cache(self, bucket_idx: int, num: int) -> Optional[List[str]]:
         """Rotate cache entries in LRU flavour.
@@ -283,48 +468,29 @@ class OTACacheDB:
             A list of OTA file's hashes that needed to be deleted for space reserving,
                 or None if no enough entries for space reserving.
         """
-        bucket_fn, last_access_fn = (
-            CacheMeta.bucket_idx.name,
-            CacheMeta.last_access.name,
-        )
+        if SQLITE_RETURNING_SUPPORTED:
+            _rows = self._con.execute(
+                self.ROTATE_STMT, (bucket_idx, num, bucket_idx, num, num)
+            ).fetchall()
+            if len(_rows) == num:
+                return [row[self.FILE_SHA256_FN] for row in _rows]
+            return
+
         # first, check whether we have required number of entries in the bucket
-        with self._con as con:
-            cur = con.execute(
-                (
-                    f"SELECT COUNT(*) FROM {self.TABLE_NAME} WHERE {bucket_fn}=? "
-                    f"ORDER BY {last_access_fn} LIMIT ?"
-                ),
-                (bucket_idx, num),
-            )
+        with self._txn() as con:
+            cur = con.execute(self.ROTATE_COUNT_STMT, (bucket_idx, num))
             if not (_raw_res := cur.fetchone()):
                 return
 
-            # NOTE: if we can upgrade to sqlite3 >= 3.35,
-            # use RETURNING clause instead of using 2 queries as below
-
             # if we have enough entries for space reserving
             if _raw_res[0] >= num:
                 # first select those entries
                 _rows = con.execute(
-                    (
-                        f"SELECT * FROM {self.TABLE_NAME} "
-                        f"WHERE {bucket_fn}=? "
-                        f"ORDER BY {last_access_fn} "
-                        "LIMIT ?"
-                    ),
-                    (bucket_idx, num),
+                    self.ROTATE_SELECT_STMT, (bucket_idx, num)
                 ).fetchall()
                 # and then delete those entries with same conditions
-                con.execute(
-                    (
-                        f"DELETE FROM {self.TABLE_NAME} "
-                        f"WHERE {bucket_fn}=? "
-                        f"ORDER BY {last_access_fn} "
-                        "LIMIT ?"
-                    ),
-                    (bucket_idx, num),
-                )
-                return [row[CacheMeta.file_sha256.name] for row in _rows]
+                con.execute(self.ROTATE_DELETE_STMT, (bucket_idx, num))
+                return [row[self.FILE_SHA256_FN] for row in _rows]
 
 
 class _ProxyBase:
@@ -332,14 +498,35 @@ class _ProxyBase:
 
     DB_THREAD_POOL_SIZE = 1
 
+    # NOTE: one thread per connection in the threadpool, check_same_thread is
+    #   disabled only to allow closing the connections at close after all the
+    #   thread workers exited.
     def _thread_initializer(self, db_f):
         """Init a db connection for each thread worker"""
-        # NOTE: set init to False always as we only operate db when using proxy
-        self._thread_local.db = OTACacheDB(db_f)
+        # NOTE: db file is already validated in __init__
+        self._thread_local.db = _db = OTACacheDB(
+            db_f, check_db=False, check_same_thread=False
+        )
+        self._dbs.append(_db)
+
+    def __init__(self, db_f: Union[str, Path], *, check_db: bool = True):
+        """Init the database connecting thread pool.
+
+        Args:
+            db_f: target db file to connect to.
+            check_db: validate the db file with check_db_file before use,
+                set to False if the caller has already validated the db file.
+
+        Raises:
+            ValueError on invalid ota_cache db file.
+        """
+        # validate the db file once here before handing out connections,
+        # instead of running the integrity check in every thread worker.
+        if check_db and not OTACacheDB.check_db_file(db_f):
+            raise ValueError(f"invalid db file: {db_f}")
 
-    def __init__(self, db_f: Union[str, Path]):
-        """Init the database connecting thread pool."""
         self._thread_local = threading.local()
+        self._dbs: List[OTACacheDB] = []
         # set thread_pool_size to 1 to make the db access
         # to make it totally concurrent.
         self._executor = ThreadPoolExecutor(
@@ -348,37 +535,52 @@ class _ProxyBase:
             initargs=(db_f,),
         )
 
+    def _dispatch(self, _method: Callable[..., T], *args) -> T:
+        """Call OTACacheDB <_method> with the db connection of current thread worker."""
+        return _method(self._thread_local.db, *args)
+
     def close(self):
         self._executor.shutdown(wait=True)
 
+        # all thread workers exited, close the db connections explicitly
+        for _db in self._dbs:
+            try:
+                _db.checkpoint()
+            except sqlite3.Error as e:
+                logger.warning(f"failed to checkpoint the db on closing: {e!r}")
+            _db.close()
+
 
 class AIO_OTACacheDBProxy(_ProxyBase):
     async def insert_entry(self, *cache_meta: CacheMeta) -> int:
-        def _inner():
-            _db: OTACacheDB = self._thread_local.db
-            return _db.insert_entry(*cache_meta)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._dispatch, OTACacheDB.insert_entry, *cache_meta
+        )
 
-        return await asyncio.get_running_loop().run_in_executor(self._executor, _inner)
+    async def bulk_insert(
+        self, cache_metas: Iterable[CacheMeta], chunk_size: int = 1000
+    ) -> int:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            self._dispatch,
+            OTACacheDB.bulk_insert,
+            cache_metas,
+            chunk_size,
+        )
 
     async def lookup_entry(
         self, fd: ColumnDescriptor, _input: Any
     ) -> Optional[CacheMeta]:
-        def _inner():
-            _db: OTACacheDB = self._thread_local.db
-            return _db.lookup_entry(fd, _input)
-
-        return await asyncio.get_running_loop().run_in_executor(self._executor, _inner)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._dispatch, OTACacheDB.lookup_entry, fd, _input
+        )
 
     async def remove_entries(self, fd: ColumnDescriptor, *_inputs: Any) -> int:
-        def _inner():
-            _db: OTACacheDB = self._thread_local.db
-            return _db.remove_entries(fd, *_inputs)
-
-        return await asyncio.get_running_loop().run_in_executor(self._executor, _inner)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._dispatch, OTACacheDB.remove_entries, fd, *_inputs
+        )
 
     async def rotate_cache(self, bucket_idx: int, num: int) -> Optional[List[str]]:
-        def _inner():
-            _db: OTACacheDB = self._thread_local.db
-            return _db.rotate_cache(bucket_idx, num)
-
-        return await asyncio.get_running_loop().run_in_executor(self._executor, _inner)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._dispatch, OTACacheDB.rotate_cache, bucket_idx, num
+        )
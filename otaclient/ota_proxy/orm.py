@@ -15,12 +15,14 @@
 
 from __future__ import annotations
 from abc import ABC
-from dataclasses import asdict, astuple, dataclass, fields
+from dataclasses import asdict, dataclass, fields
 from io import StringIO
+from operator import attrgetter
 from typing import (
     TYPE_CHECKING,
     Any,
     Callable,
+    ClassVar,
     Dict,
     List,
     Optional,
@@ -163,7 +165,23 @@ class ORMeta(type):
         if len(new_cls.__mro__) > 2:  # <TableCls>, ORMBase, object
             # we will define our own eq and hash logics, disable dataclass'
             # eq method and hash method generation
-            return dataclass(eq=False, unsafe_hash=False)(new_cls)
+            new_cls = dataclass(eq=False, unsafe_hash=False)(new_cls)
+
+            # pre-compute the field names and the getter for exporting
+            # all fields' value as tuple at class creation time
+            _field_names = tuple(field.name for field in fields(new_cls))
+            # NOTE: read the underlying private attributes directly to bypass
+            #   the python-level ColumnDescriptor.__get__ call on each field
+            _getter = attrgetter(
+                *(getattr(new_cls, _name)._private_name for _name in _field_names)
+            )
+            new_cls._field_names = _field_names
+            new_cls._fields_getter = (
+                _getter
+                if len(_field_names) > 1
+                else lambda _inst: (_getter(_inst),)  # attrgetter with one attr
+            )
+            return new_cls
         else:  # ORMBase, object
             return new_cls
 
@@ -174,19 +192,22 @@ class ORMBase(metaclass=ORMeta):
     Subclass of this base class is also a subclass of dataclass.
     """
 
+    # NOTE: the following are populated by ORMeta at <TableCls> creation
+    _field_names: ClassVar[Tuple[str, ...]]
+    _fields_getter: ClassVar[Callable[[Any], Tuple[SQLITE_DATATYPES, ...]]]
+
     @classmethod
     def row_to_meta(cls, row: "Union[sqlite3.Row, Dict[str, Any], Tuple[Any]]") -> Self:
-        parsed = {}
-        for field in fields(cls):
-            try:
-                col: ColumnDescriptor = getattr(cls, field.name)
-                if isinstance(row, tuple):
-                    parsed[col.name] = row[col.index]
-                else:
-                    parsed[col.name] = row[col.name]
-            except (IndexError, KeyError):
-                continue  # silently ignore unknonw input fields
-        return cls(**parsed)
+        """Parse a row into <TableCls> instance.
+
+        NOTE: except dict, <row> is parsed by position, so the columns in <row>
+            must be in the same order as the table definition, which is the case
+            for the rows returned by "SELECT *" query.
+        """
+        if isinstance(row, dict):
+            # silently ignore unknown input fields
+            return cls(**{k: row[k] for k in cls._field_names if k in row})
+        return cls(*row[: len(cls._field_names)])
 
     @classmethod
     def get_create_table_stmt(cls, table_name: str) -> str:
@@ -220,23 +241,19 @@ class ORMBase(metaclass=ORMeta):
     @classmethod
     def get_shape(cls) -> str:
         """Used by insert row query."""
-        return ",".join(["?"] * len(fields(cls)))
+        return ",".join(["?"] * len(cls._field_names))
 
     def __hash__(self) -> int:
         """compute the hash with all stored fields' value."""
-        return hash(astuple(self))
+        return hash(self._fields_getter(self))
 
     def __eq__(self, __o: object) -> bool:
         if not isinstance(__o, self.__class__):
             return False
-        for field in fields(self):
-            field_name = field.name
-            if getattr(self, field_name) != getattr(__o, field_name):
-                return False
-        return True
+        return self._fields_getter(self) == self._fields_getter(__o)
 
     def astuple(self) -> Tuple[SQLITE_DATATYPES, ...]:
-        return astuple(self)
+        return self._fields_getter(self)
 
     def asdict(self) -> Dict[str, SQLITE_DATATYPES]:
         return asdict(self)
@@ -465,8 +465,8 @@ class LRUCacheHelper:
     BSIZE_LIST = list(cfg.BUCKET_FILE_SIZE_DICT.keys())
     BSIZE_DICT = cfg.BUCKET_FILE_SIZE_DICT
 
-    def __init__(self, db_f: Union[str, Path]):
-        self._db = AIO_OTACacheDBProxy(db_f)
+    def __init__(self, db_f: Union[str, Path], *, check_db: bool = True):
+        self._db = AIO_OTACacheDBProxy(db_f, check_db=check_db)
         self._closed = False
 
     def close(self):
@@ -676,7 +676,9 @@ class OTACache:
             self._executor.submit(self._background_check_free_space)
 
             # init cache helper(and connect to ota_cache db)
-            self._lru_helper = LRUCacheHelper(self._db_file)
+            # NOTE: the db file is either just validated or just initialized above,
+            #   skip the integrity check to not block the event loop again.
+            self._lru_helper = LRUCacheHelper(self._db_file, check_db=False)
             self._on_going_caching = CachingRegister(self._base_dir)
 
             if self._upper_proxy:
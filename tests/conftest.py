@@ -13,17 +13,17 @@
 # limitations under the License.
 
 
+import asyncio
 import logging
+import os
 import pytest
-import pytest_mock
 import shutil
-import time
-from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from multiprocessing import Process
 from pathlib import Path
+from typing import List, Optional
 
-from tests.utils import SlotMeta, run_http_server
+from tests.utils import SlotMeta, run_http_server, wait_for_server
 
 logger = logging.getLogger(__name__)
 
@@ -94,23 +94,83 @@ class TestConfiguration:
 
 cfg = TestConfiguration()
 
+# NOTE: the tests copy the whole OTA image(~110MiB) around several times,
+#       set OTA_TEST_USE_TMPFS=1 to use tmpfs as pytest's tmp root when
+#       there is enough space on it.
+# NOTE 2: pytest keeps the last 3 basetemps, which will occupy the RAM
+#       backed tmpfs until reboot, so this is opt-in.
+TMPFS_TEMPROOT_ENV = "OTA_TEST_USE_TMPFS"
+TMPFS_TEMPROOT = "/dev/shm"
+TMPFS_TEMPROOT_MIN_FREE = 2 * 1024**3  # 2GiB
 
-@pytest.fixture(autouse=True, scope="session")
-def run_http_server_subprocess():
-    _server_p = Process(
+
+def pytest_configure(config: pytest.Config):
+    if (
+        os.environ.get(TMPFS_TEMPROOT_ENV) != "1"
+        or config.option.basetemp
+        or os.environ.get("PYTEST_DEBUG_TEMPROOT")
+    ):
+        return
+
+    try:
+        if (
+            os.access(TMPFS_TEMPROOT, os.W_OK)
+            and shutil.disk_usage(TMPFS_TEMPROOT).free >= TMPFS_TEMPROOT_MIN_FREE
+        ):
+            os.environ["PYTEST_DEBUG_TEMPROOT"] = TMPFS_TEMPROOT
+    except OSError:
+        pass  # fallback to use the default tmp root
+
+
+_ota_image_server: Optional[Process] = None
+
+
+def _is_xdist_worker(config: pytest.Config) -> bool:
+    return hasattr(config, "workerinput")
+
+
+def pytest_sessionstart(session: pytest.Session):
+    """Start the background ota-image server once for the whole test run.
+
+    NOTE: when running with pytest-xdist, the server is started by the
+          controller process and shared by all the workers.
+    """
+    global _ota_image_server
+    if _is_xdist_worker(session.config):
+        return
+
+    _ota_image_server = Process(
         target=run_http_server,
         args=[cfg.OTA_IMAGE_SERVER_ADDR, cfg.OTA_IMAGE_SERVER_PORT],
         kwargs={"directory": cfg.OTA_IMAGE_DIR},
+        daemon=True,
     )
-    try:
-        _server_p.start()
-        # NOTE: wait for 2 seconds for the server to fully start
-        time.sleep(2)
-        logger.info(f"start background ota-image server on {cfg.OTA_IMAGE_URL}")
-        yield
-    finally:
+    _ota_image_server.start()
+    if not wait_for_server(cfg.OTA_IMAGE_SERVER_ADDR, cfg.OTA_IMAGE_SERVER_PORT):
+        logger.warning("ota-image server doesn't become ready in time")
+    logger.info(f"start background ota-image server on {cfg.OTA_IMAGE_URL}")
+
+
+def pytest_sessionfinish(session: pytest.Session):
+    if _ota_image_server is not None:
         logger.info("shutdown background ota-image server")
-        _server_p.kill()
+        _ota_image_server.kill()
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(config: pytest.Config, items: List[pytest.Item]):
+    """Keep tests from the same module in the same pytest-xdist worker.
+
+    Tests within one module share module/class scope fixtures and fixed
+    listen ports. Modules that share fixed ports with other modules are
+    explicitly marked with the same xdist_group.
+
+    NOTE: this only takes effect with "--dist loadgroup".
+    """
+    for item in items:
+        if item.get_closest_marker("xdist_group") is None:
+            _module_path = item.nodeid.split("::", 1)[0]
+            item.add_marker(pytest.mark.xdist_group(_module_path))
 
 
 @pytest.fixture(scope="session")
@@ -170,20 +230,25 @@ def ab_slots(tmp_path_factory: pytest.TempPathFactory) -> SlotMeta:
     )
 
 
-class ThreadpoolExecutorFixtureMixin:
-    THTREADPOOL_EXECUTOR_PATCH_PATH: str
-
-    @pytest.fixture
-    def setup_executor(self, mocker: pytest_mock.MockerFixture):
-        try:
-            self._executor = ThreadPoolExecutor()
-            mocker.patch(
-                f"{self.THTREADPOOL_EXECUTOR_PATCH_PATH}.ThreadPoolExecutor",
-                return_value=self._executor,
-            )
-            logger.info(
-                f"ThreadpoolExecutor is patched at {self.THTREADPOOL_EXECUTOR_PATCH_PATH}"
-            )
-            yield
-        finally:
-            self._executor.shutdown()
+@pytest.fixture(scope="session")
+def event_loop():
+    """Share one event loop across the whole test session.
+
+    NOTE: pytest-asyncio creates a new event loop for each test by default,
+          override the event_loop fixture to avoid the loop setup/teardown
+          for every async test.
+    """
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(autouse=True)
+def ensure_no_pending_tasks(request: pytest.FixtureRequest):
+    """Ensure async tests don't leave pending tasks on the shared event loop."""
+    yield
+    if "event_loop" not in request.fixturenames:
+        return
+    _loop: asyncio.AbstractEventLoop = request.getfixturevalue("event_loop")
+    _pending = [_task for _task in asyncio.all_tasks(_loop) if not _task.done()]
+    assert not _pending, f"pending tasks left on the event loop: {_pending}"
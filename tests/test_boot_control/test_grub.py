@@ -21,9 +21,16 @@ import pytest
 import pytest_mock
 from pathlib import Path
 
+from otaclient.app.boot_control._common import CMDHelperFuncs, SlotMountHelper
+from otaclient.app.boot_control._grub import (
+    GrubABPartitionDetector,
+    GrubController,
+    GrubHelper,
+)
+from otaclient.app.boot_control.configs import GrubControlConfig
 from otaclient.app.proto import wrapper
 
-from tests.utils import SlotMeta
+from tests.utils import SlotMeta, link_or_copy
 from tests.conftest import TestConfiguration as cfg
 
 logger = logging.getLogger(__name__)
@@ -133,8 +140,6 @@ class TestGrubControl:
     DEFAULT_GRUB = (Path(__file__).parent / "default_grub").read_text()
 
     def cfg_for_slot_a_as_current(self):
-        from otaclient.app.boot_control.configs import GrubControlConfig
-
         _mocked_grub_cfg = GrubControlConfig()
         _mocked_grub_cfg.MOUNT_POINT = str(self.slot_b)  # type: ignore
         _mocked_grub_cfg.ACTIVE_ROOTFS_PATH = str(self.slot_a)  # type: ignore
@@ -147,8 +152,6 @@ class TestGrubControl:
         return _mocked_grub_cfg
 
     def cfg_for_slot_b_as_current(self):
-        from otaclient.app.boot_control.configs import GrubControlConfig
-
         _mocked_grub_cfg = GrubControlConfig()
         _mocked_grub_cfg.MOUNT_POINT = str(self.slot_a)  # type: ignore
         _mocked_grub_cfg.ACTIVE_ROOTFS_PATH = str(self.slot_b)  # type: ignore
@@ -219,9 +222,6 @@ class TestGrubControl:
         mocker: pytest_mock.MockerFixture,
         grub_ab_slot,
     ):
-        from otaclient.app.boot_control._grub import GrubABPartitionDetector
-        from otaclient.app.boot_control._common import CMDHelperFuncs, SlotMountHelper
-
         # ------ start fsm ------ #
         self._fsm = GrubFSM(slot_a_mp=self.slot_a, slot_b_mp=self.slot_b)
 
@@ -271,18 +271,13 @@ class TestGrubControl:
             CMDHelperFuncs, mocker.MagicMock(spec=CMDHelperFuncs)
         )
         _CMDHelper_mock.reboot.side_effect = self._fsm.switch_boot
-        _CMDHelper_mock.get_attrs_by_dev = mocker.MagicMock(
-            wraps=self._fsm.get_attrs_by_dev
-        )
+        _CMDHelper_mock.get_attrs_by_dev = self._fsm.get_attrs_by_dev
         # bind the mocker to the test instance
         self._CMDHelper_mock = _CMDHelper_mock
 
         ###### mock GrubHelper ######
         _grub_mkconfig_path = f"{cfg.GRUB_MODULE_PATH}.GrubHelper.grub_mkconfig"
-        mocker.patch(
-            _grub_mkconfig_path,
-            wraps=self._grub_mkconfig_fsm.grub_mkconfig,
-        )
+        mocker.patch(_grub_mkconfig_path, self._grub_mkconfig_fsm.grub_mkconfig)
 
         ###### patching ######
         # patch CMDHelper
@@ -305,13 +300,19 @@ class TestGrubControl:
         mocker.patch(_SlotMountHelper_path, return_value=_mocked_slot_mount_helper)
         # patch reading from /proc/cmdline
         mocker.patch(
-            f"{cfg.GRUB_MODULE_PATH}.cat_proc_cmdline",
-            mocker.MagicMock(wraps=self._fsm.cat_proc_cmdline),
+            f"{cfg.GRUB_MODULE_PATH}.cat_proc_cmdline", self._fsm.cat_proc_cmdline
         )
 
-    def test_grub_normal_update(self, mocker: pytest_mock.MockerFixture):
-        from otaclient.app.boot_control._grub import GrubController
+    def _assert_ota_partition_points_to(self, slot_id: str):
+        assert (
+            os.readlink(self.boot_dir / cfg.OTA_PARTITION_DIRNAME)
+            == f"{cfg.OTA_PARTITION_DIRNAME}.{slot_id}"
+        )
+
+    def _assert_ota_status(self, ota_partition_dir: Path, status: wrapper.StatusOta):
+        assert (ota_partition_dir / "status").read_text() == status.name
 
+    def test_grub_normal_update(self, mocker: pytest_mock.MockerFixture):
         _cfg_patch_path = f"{cfg.GRUB_MODULE_PATH}.cfg"
 
         ###### stage 1 ######
@@ -321,14 +322,11 @@ class TestGrubControl:
         mocker.patch(_cfg_patch_path, self.cfg_for_slot_a_as_current())
 
         grub_controller = GrubController()
-        assert (
-            self.slot_a_ota_partition_dir / "status"
-        ).read_text() == wrapper.StatusOta.INITIALIZED.name
-        # assert ota-partition file points to slot_a ota-partition folder
-        assert (
-            os.readlink(self.boot_dir / cfg.OTA_PARTITION_DIRNAME)
-            == f"{cfg.OTA_PARTITION_DIRNAME}.{cfg.SLOT_A_ID_GRUB}"
+        self._assert_ota_status(
+            self.slot_a_ota_partition_dir, wrapper.StatusOta.INITIALIZED
         )
+        # assert ota-partition file points to slot_a ota-partition folder
+        self._assert_ota_partition_points_to(cfg.SLOT_A_ID_GRUB)
         assert (
             self.boot_dir / "grub/grub.cfg"
         ).read_text() == GrubMkConfigFSM.GRUB_CFG_SLOT_A_UPDATED
@@ -340,18 +338,18 @@ class TestGrubControl:
             erase_standby=False,  # NOTE: not used
         )
         # update slot_b, slot_a_ota_status->FAILURE, slot_b_ota_status->UPDATING
-        assert (
-            self.slot_a_ota_partition_dir / "status"
-        ).read_text() == wrapper.StatusOta.FAILURE.name
-        assert (
-            self.slot_b_ota_partition_dir / "status"
-        ).read_text() == wrapper.StatusOta.UPDATING.name
+        self._assert_ota_status(
+            self.slot_a_ota_partition_dir, wrapper.StatusOta.FAILURE
+        )
+        self._assert_ota_status(
+            self.slot_b_ota_partition_dir, wrapper.StatusOta.UPDATING
+        )
         # NOTE: we have to copy the new kernel files to the slot_b's boot dir
         #       this is done by the create_standby module
         _kernel = f"{cfg.KERNEL_PREFIX}-{cfg.KERNEL_VERSION}"
         _initrd = f"{cfg.INITRD_PREFIX}-{cfg.KERNEL_VERSION}"
-        shutil.copy(self.slot_a_ota_partition_dir / _kernel, self.slot_b_boot_dir)
-        shutil.copy(self.slot_a_ota_partition_dir / _initrd, self.slot_b_boot_dir)
+        link_or_copy(self.slot_a_ota_partition_dir / _kernel, self.slot_b_boot_dir)
+        link_or_copy(self.slot_a_ota_partition_dir / _initrd, self.slot_b_boot_dir)
 
         logger.info("pre-update completed, entering post-update...")
         # test post-update
@@ -383,25 +381,19 @@ class TestGrubControl:
 
         ### test pre-init ###
         assert self._fsm.is_boot_switched
-        assert (
-            self.slot_b_ota_partition_dir / "status"
-        ).read_text() == wrapper.StatusOta.UPDATING.name
-        # assert ota-partition file is not yet switched before first reboot init
-        assert (
-            os.readlink(self.boot_dir / cfg.OTA_PARTITION_DIRNAME)
-            == f"{cfg.OTA_PARTITION_DIRNAME}.{cfg.SLOT_A_ID_GRUB}"
+        self._assert_ota_status(
+            self.slot_b_ota_partition_dir, wrapper.StatusOta.UPDATING
         )
+        # assert ota-partition file is not yet switched before first reboot init
+        self._assert_ota_partition_points_to(cfg.SLOT_A_ID_GRUB)
 
         ### test first reboot init ###
         _ = GrubController()
         # assert ota-partition file switch to slot_b ota-partition folder after first reboot init
-        assert (
-            os.readlink(self.boot_dir / cfg.OTA_PARTITION_DIRNAME)
-            == f"{cfg.OTA_PARTITION_DIRNAME}.{cfg.SLOT_B_ID_GRUB}"
+        self._assert_ota_partition_points_to(cfg.SLOT_B_ID_GRUB)
+        self._assert_ota_status(
+            self.slot_b_ota_partition_dir, wrapper.StatusOta.SUCCESS
         )
-        assert (
-            self.slot_b_ota_partition_dir / "status"
-        ).read_text() == wrapper.StatusOta.SUCCESS.name
         assert (
             self.slot_b_ota_partition_dir / "version"
         ).read_text() == cfg.UPDATE_VERSION
@@ -459,7 +451,5 @@ GRUB_DISABLE_RECOVERY=true
 def test_update_grub_default(
     input: str, default_entry: typing.Optional[int], expected: str
 ):
-    from otaclient.app.boot_control._grub import GrubHelper
-
     updated = GrubHelper.update_grub_default(input, default_entry_idx=default_entry)
     assert updated == expected
@@ -1,14 +1,18 @@
 import os
 import pytest
 import pytest_mock
-import shutil
 import typing
 from pathlib import Path
 from string import Template
 
-from tests.utils import SlotMeta
+from tests.utils import SlotMeta, link_or_copy
 from tests.conftest import TestConfiguration as cfg
-from otaclient.app.boot_control._rpi_boot import _FSTAB_TEMPLATE_STR
+from otaclient.app.boot_control._common import CMDHelperFuncs
+from otaclient.app.boot_control._rpi_boot import (
+    _FSTAB_TEMPLATE_STR,
+    _RPIBootControl,
+    RPIBootController,
+)
 from otaclient.app.boot_control.configs import rpi_boot_cfg
 from otaclient.app.proto import wrapper
 
@@ -117,48 +121,40 @@ class TestRPIBootControl:
         self.system_boot = tmp_path / "system-boot"
         self.system_boot.mkdir(parents=True, exist_ok=True)
         # NOTE: primary config.txt is for slot_a at the beginning
-        (self.system_boot / f"{rpi_boot_cfg.CONFIG_TXT}").write_text(
-            _RPIBootTestCfg.CONFIG_TXT_SLOT_A
-        )
         # NOTE: rpi_boot controller now doesn't check the content of boot files, but only ensure the existence
-        (
-            self.system_boot
-            / f"{rpi_boot_cfg.CONFIG_TXT}{_RPIBootTestCfg.SEP_CHAR}{_RPIBootTestCfg.SLOT_A}"
-        ).write_text(_RPIBootTestCfg.CONFIG_TXT_SLOT_A)
-        (
-            self.system_boot
-            / f"{rpi_boot_cfg.CONFIG_TXT}{_RPIBootTestCfg.SEP_CHAR}{_RPIBootTestCfg.SLOT_B}"
-        ).write_text(_RPIBootTestCfg.CONFIG_TXT_SLOT_B)
-        (
-            self.system_boot
-            / f"{rpi_boot_cfg.CMDLINE_TXT}{_RPIBootTestCfg.SEP_CHAR}{_RPIBootTestCfg.SLOT_A}"
-        ).write_text(_RPIBootTestCfg.CMDLINE_TXT_SLOT_A)
-        (
-            self.system_boot
-            / f"{rpi_boot_cfg.CMDLINE_TXT}{_RPIBootTestCfg.SEP_CHAR}{_RPIBootTestCfg.SLOT_B}"
-        ).write_text(_RPIBootTestCfg.CMDLINE_TXT_SLOT_B)
-        (
-            self.system_boot
-            / f"{rpi_boot_cfg.VMLINUZ}{_RPIBootTestCfg.SEP_CHAR}{_RPIBootTestCfg.SLOT_A}"
-        ).write_text("slot_a_vmlinux")
-        (
-            self.system_boot
-            / f"{rpi_boot_cfg.INITRD_IMG}{_RPIBootTestCfg.SEP_CHAR}{_RPIBootTestCfg.SLOT_A}"
-        ).write_text("slot_a_initrdimg")
+        _sep = _RPIBootTestCfg.SEP_CHAR
+        _slot_a, _slot_b = _RPIBootTestCfg.SLOT_A, _RPIBootTestCfg.SLOT_B
+        for _fname, _contents in (
+            (rpi_boot_cfg.CONFIG_TXT, _RPIBootTestCfg.CONFIG_TXT_SLOT_A),
+            (
+                f"{rpi_boot_cfg.CONFIG_TXT}{_sep}{_slot_a}",
+                _RPIBootTestCfg.CONFIG_TXT_SLOT_A,
+            ),
+            (
+                f"{rpi_boot_cfg.CONFIG_TXT}{_sep}{_slot_b}",
+                _RPIBootTestCfg.CONFIG_TXT_SLOT_B,
+            ),
+            (
+                f"{rpi_boot_cfg.CMDLINE_TXT}{_sep}{_slot_a}",
+                _RPIBootTestCfg.CMDLINE_TXT_SLOT_A,
+            ),
+            (
+                f"{rpi_boot_cfg.CMDLINE_TXT}{_sep}{_slot_b}",
+                _RPIBootTestCfg.CMDLINE_TXT_SLOT_B,
+            ),
+            (f"{rpi_boot_cfg.VMLINUZ}{_sep}{_slot_a}", "slot_a_vmlinux"),
+            (f"{rpi_boot_cfg.INITRD_IMG}{_sep}{_slot_a}", "slot_a_initrdimg"),
+        ):
+            (self.system_boot / _fname).write_text(_contents)
         self.vmlinuz_slot_b = (
-            self.system_boot
-            / f"{rpi_boot_cfg.VMLINUZ}{_RPIBootTestCfg.SEP_CHAR}{_RPIBootTestCfg.SLOT_B}"
+            self.system_boot / f"{rpi_boot_cfg.VMLINUZ}{_sep}{_slot_b}"
         )
         self.initrd_img_slot_b = (
-            self.system_boot
-            / f"{rpi_boot_cfg.INITRD_IMG}{_RPIBootTestCfg.SEP_CHAR}{_RPIBootTestCfg.SLOT_B}"
+            self.system_boot / f"{rpi_boot_cfg.INITRD_IMG}{_sep}{_slot_b}"
         )
 
     @pytest.fixture(autouse=True)
     def mock_setup(self, mocker: pytest_mock.MockerFixture, rpi_boot_ab_slot):
-        from otaclient.app.boot_control._rpi_boot import _RPIBootControl
-        from otaclient.app.boot_control._common import CMDHelperFuncs
-
         # start the test FSM
         self._fsm = RPIBootABPartitionFSM()
 
@@ -194,8 +190,6 @@ class TestRPIBootControl:
         )
 
     def test_rpi_boot_normal_update(self, mocker: pytest_mock.MockerFixture):
-        from otaclient.app.boot_control._rpi_boot import RPIBootController
-
         # ------ patch rpi_boot_cfg for boot_controller_inst1.stage 1~3 ------#
         _rpi_boot_cfg_path = f"{cfg.BOOT_CONTROL_CONFIG_MODULE_PATH}.rpi_boot_cfg"
         mocker.patch(
@@ -247,9 +241,9 @@ class TestRPIBootControl:
         #       because we skip the create_standby step
         # NOTE 2: not copy the symlinks
         _vmlinuz = self.slot_a_boot_dir / "vmlinuz"
-        shutil.copy(os.path.realpath(_vmlinuz), self.slot_b_boot_dir)
+        link_or_copy(os.path.realpath(_vmlinuz), self.slot_b_boot_dir)
         _initrd_img = self.slot_a_boot_dir / "initrd.img"
-        shutil.copy(os.path.realpath(_initrd_img), self.slot_b_boot_dir)
+        link_or_copy(os.path.realpath(_initrd_img), self.slot_b_boot_dir)
 
         # ------ boot_controller_inst1.stage3: post_update, reboot switch boot ------ #
         # --- execution --- #
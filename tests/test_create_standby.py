@@ -21,7 +21,9 @@ from pathlib import Path
 from pytest_mock import MockerFixture
 
 from otaclient.app.boot_control import BootControllerProtocol
-from otaclient.app.configs import config as otaclient_cfg
+from otaclient.app.configs import BaseConfig, config as otaclient_cfg
+from otaclient.app.create_standby.rebuild_mode import RebuildMode
+from otaclient.app.ota_client import _OTAUpdater, OTAClientControlFlags
 
 from tests.conftest import TestConfiguration as cfg
 from tests.utils import SlotMeta, compare_dir
@@ -64,8 +66,6 @@ class Test_OTAupdate_with_create_standby_RebuildMode:
 
     @pytest.fixture(autouse=True)
     def mock_setup(self, mocker: MockerFixture, prepare_ab_slots):
-        from otaclient.app.configs import BaseConfig
-
         # ------ mock boot_controller ------ #
         self._boot_control = typing.cast(
             BootControllerProtocol, mocker.MagicMock(spec=BootControllerProtocol)
@@ -82,9 +82,6 @@ class Test_OTAupdate_with_create_standby_RebuildMode:
         mocker.patch(f"{cfg.OTAMETA_MODULE_PATH}.cfg", _cfg)
 
     def test_update_with_create_standby_RebuildMode(self, mocker: MockerFixture):
-        from otaclient.app.ota_client import _OTAUpdater, OTAClientControlFlags
-        from otaclient.app.create_standby.rebuild_mode import RebuildMode
-
         # ------ execution ------ #
         otaclient_control_flags = typing.cast(
             OTAClientControlFlags, mocker.MagicMock(spec=OTAClientControlFlags)
@@ -19,7 +19,6 @@ import threading
 import pytest
 import pytest_mock
 import requests
-import requests_mock
 from pathlib import Path
 from urllib.parse import urlsplit, urljoin
 
@@ -200,15 +199,9 @@ class TestDownloader:
         expected_ota_download_err,
         mocker: pytest_mock.MockerFixture,
     ):
-        _mock_adapter = requests_mock.Adapter()
-        _mock_adapter.register_uri(
-            requests_mock.ANY,
-            requests_mock.ANY,
-            exc=inject_requests_err,
-        )
-
-        # load the mocker adapter to the Downloader session
-        self.session.mount(cfg.OTA_IMAGE_URL, _mock_adapter)
+        # inject the error directly into the Downloader session,
+        # no request will actually be sent
+        mocker.patch.object(self.session, "get", side_effect=inject_requests_err)
 
         _target_path = tmp_path / self.TEST_FILE
         url = urljoin_ensure_base(cfg.OTA_IMAGE_URL, self.TEST_FILE)
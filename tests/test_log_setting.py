@@ -29,6 +29,9 @@ def test_server_logger():
     # ------ setup test ------ #
     _handler = log_setting._LogTeeHandler()
     logger.addHandler(_handler)
+    # NOTE: don't rely on the root logger's level being set by log_cli_level,
+    #       which doesn't take effect under pytest-xdist workers.
+    logger.setLevel(logging.INFO)
 
     # ------ execution ------ #
     logger.info(test_log_msg)
@@ -22,14 +22,20 @@ import shutil
 from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Tuple
 
 from otaclient.app.boot_control import BootControllerProtocol
 from otaclient.app.boot_control.configs import BootloaderType
 from otaclient.app.create_standby import StandbySlotCreatorProtocol
 from otaclient.app.create_standby.common import DeltaBundle, RegularDelta
-from otaclient.app.configs import config as otaclient_cfg
-from otaclient.app.errors import OTAErrorRecoverable
+from otaclient.app.configs import BaseConfig, config as otaclient_cfg
+from otaclient.app import downloader
+from otaclient.app.errors import (
+    MetadataJWTVerficationFailed,
+    OTAErrorRecoverable,
+    OTAErrorUnrecoverable,
+    OTAMetaDownloadFailed,
+)
 from otaclient.app.ota_client import (
     OTAClient,
     _OTAUpdater,
@@ -44,6 +50,76 @@ from otaclient.configs.ecu_info import ECUInfo
 from tests.conftest import TestConfiguration as cfg
 from tests.utils import SlotMeta
 
+UPDATE_COOKIES_JSON = r'{"test": "my-cookie"}'
+
+
+# number of regular files to download for the mini OTA image
+MINI_OTA_IMAGE_REGULARS_NUM = 10
+
+
+@pytest.fixture(scope="module")
+def ota_image_metafiles() -> Tuple[List[RegularInf], List[DirectoryInf]]:
+    """Parse the regulars.txt and dirs.txt of the OTA image.
+
+    NOTE: parsing the OTA image metadata is relatively expensive, and the
+          parsed entries are not changed by the tests, so it is done only
+          once for the whole module.
+    """
+    _ota_image_dir = Path(cfg.OTA_IMAGE_DIR)
+    with open(_ota_image_dir / "regulars.txt", "r") as _f:
+        _regulars = list(map(parse_regulars_from_txt, _f))
+    with open(_ota_image_dir / "dirs.txt", "r") as _f:
+        _dirs = list(map(parse_dirs_from_txt, _f))
+    return _regulars, _dirs
+
+
+@pytest.fixture(params=["mini", pytest.param("full", marks=pytest.mark.slow)])
+def ota_image_delta_bundle(
+    request: pytest.FixtureRequest,
+    ab_slots: SlotMeta,
+    ota_image_metafiles: Tuple[List[RegularInf], List[DirectoryInf]],
+) -> DeltaBundle:
+    """Manually create the delta bundle from the OTA image.
+
+    For <mini> OTA image, only the first MINI_OTA_IMAGE_REGULARS_NUM regular
+    files of the OTA image are included, which is enough for testing the
+    OTA update workflow. <full> OTA image includes all the regular files.
+
+    NOTE: the getter APIs of DeltaBundle consume the bundle, so a new one
+          is created for each test.
+    """
+    _regulars, _dirs = ota_image_metafiles
+    if request.param == "mini":
+        _regulars = _regulars[:MINI_OTA_IMAGE_REGULARS_NUM]
+    _standby_ota_tmp = Path(ab_slots.slot_b) / ".ota-tmp"
+
+    # --- prepare regulars --- #
+    # NOTE: since we don't prepare any local copy in the test,
+    #       we need to download all the unique files
+    _donwload_list_dict: Dict[bytes, RegularInf] = {}
+    _new_delta = RegularDelta()
+    for _entry in _regulars:
+        _new_delta.add_entry(_entry)
+        if _entry.sha256hash not in _donwload_list_dict:
+            _donwload_list_dict[_entry.sha256hash] = _entry
+    _download_list = list(_donwload_list_dict.values())
+    _total_donwload_files_size = sum(
+        _unique_entry.size if _unique_entry.size else 0
+        for _unique_entry in _download_list
+    )
+
+    # --- create bundle --- #
+    return DeltaBundle(
+        rm_delta=[],
+        download_list=_download_list,
+        new_delta=_new_delta,
+        new_dirs=OrderedDict.fromkeys(_dirs),
+        delta_src=Path(ab_slots.slot_a),
+        delta_files_dir=_standby_ota_tmp,
+        total_regular_num=len(_regulars),
+        total_download_files_size=_total_donwload_files_size,
+    )
+
 
 class Test_OTAUpdater:
     """
@@ -78,52 +154,16 @@ class Test_OTAUpdater:
         shutil.rmtree(self.slot_b, ignore_errors=True)
 
     @pytest.fixture
-    def _delta_generate(self, prepare_ab_slots):
-        _ota_image_dir = Path(cfg.OTA_IMAGE_DIR)
-        _standby_ota_tmp = self.slot_b / ".ota-tmp"
-
-        # ------ manually create delta bundle ------ #
-        # --- parse regulars.txt --- #
-        # NOTE: since we don't prepare any local copy in the test,
-        #       we need to download all the unique files
-        _donwload_list_dict: Dict[bytes, RegularInf] = {}
-        _new_delta = RegularDelta()
-        _total_regulars_num, _total_donwload_files_size = 0, 0
-        with open(_ota_image_dir / "regulars.txt", "r") as _f:
-            for _l in _f:
-                _entry = parse_regulars_from_txt(_l)
-                _total_regulars_num += 1
-                _new_delta.add_entry(_entry)
-                if _entry.sha256hash not in _donwload_list_dict:
-                    _donwload_list_dict[_entry.sha256hash] = _entry
-        _download_list = list(_donwload_list_dict.values())
-        for _unique_entry in _download_list:
-            _total_donwload_files_size += (
-                _unique_entry.size if _unique_entry.size else 0
-            )
-
-        # --- parse dirs.txt --- #
-        _new_dirs: Dict[DirectoryInf, None] = OrderedDict()
-        with open(_ota_image_dir / "dirs.txt", "r") as _f:
-            for _dir in map(parse_dirs_from_txt, _f):
-                _new_dirs[_dir] = None
-
-        # --- create bundle --- #
-        self._delta_bundle = DeltaBundle(
-            rm_delta=[],
-            download_list=_download_list,
-            new_delta=_new_delta,
-            new_dirs=_new_dirs,
-            delta_src=self.slot_a,
-            delta_files_dir=_standby_ota_tmp,
-            total_regular_num=_total_regulars_num,
-            total_download_files_size=_total_donwload_files_size,
-        )
+    def _delta_generate(self, prepare_ab_slots, ota_image_delta_bundle: DeltaBundle):
+        self._delta_bundle = ota_image_delta_bundle
 
     @pytest.fixture(autouse=True)
-    def mock_setup(self, mocker: pytest_mock.MockerFixture, _delta_generate):
-        from otaclient.app.configs import BaseConfig
-
+    def mock_setup(
+        self,
+        mocker: pytest_mock.MockerFixture,
+        monkeypatch: pytest.MonkeyPatch,
+        _delta_generate,
+    ):
         # ------ mock boot_controller ------ #
         self._boot_control = typing.cast(
             BootControllerProtocol, mocker.MagicMock(spec=BootControllerProtocol)
@@ -147,8 +187,8 @@ class Test_OTAUpdater:
         _cfg.MOUNT_POINT = str(self.slot_b)  # type: ignore
         _cfg.ACTIVE_ROOTFS_PATH = str(self.slot_a)  # type: ignore
         _cfg.RUN_DIR = str(self.otaclient_run_dir)  # type: ignore
-        mocker.patch(f"{cfg.OTACLIENT_MODULE_PATH}.cfg", _cfg)
-        mocker.patch(f"{cfg.OTAMETA_MODULE_PATH}.cfg", _cfg)
+        monkeypatch.setattr(f"{cfg.OTACLIENT_MODULE_PATH}.cfg", _cfg)
+        monkeypatch.setattr(f"{cfg.OTAMETA_MODULE_PATH}.cfg", _cfg)
 
         # ------ mock stats collector ------ #
         mocker.patch(
@@ -156,8 +196,6 @@ class Test_OTAUpdater:
         )
 
     def test_OTAUpdater(self, mocker: pytest_mock.MockerFixture):
-        from otaclient.app.ota_client import _OTAUpdater, OTAClientControlFlags
-
         # ------ execution ------ #
         otaclient_control_flags = typing.cast(
             OTAClientControlFlags, mocker.MagicMock(spec=OTAClientControlFlags)
@@ -173,14 +211,14 @@ class Test_OTAUpdater:
         _updater.execute(
             version=cfg.UPDATE_VERSION,
             raw_url_base=cfg.OTA_IMAGE_URL,
-            cookies_json=r'{"test": "my-cookie"}',
+            cookies_json=UPDATE_COOKIES_JSON,
         )
 
         # ------ assertions ------ #
         # assert OTA files are downloaded
-        _downloaded_files_size = 0
-        for _f in self.ota_tmp_dir.glob("*"):
-            _downloaded_files_size += _f.stat().st_size
+        _downloaded_files_size = sum(
+            _f.stat().st_size for _f in self.ota_tmp_dir.glob("*")
+        )
         assert _downloaded_files_size == self._delta_bundle.total_download_files_size
         # assert the control_flags has been waited
         otaclient_control_flags.wait_can_reboot_flag.assert_called_once()
@@ -194,6 +232,93 @@ class Test_OTAUpdater:
         process_persists_handler.assert_called_once()
 
 
+class Test_OTAUpdaterMetadataDownloadFailed:
+    """
+    NOTE: OTA update fails at the very first download(metadata.jwt), so
+          no OTA image and AB slots are needed for this test.
+    """
+
+    @pytest.fixture(autouse=True)
+    def mock_setup(
+        self,
+        tmp_path: Path,
+        mocker: pytest_mock.MockerFixture,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        # ------ mock boot_controller ------ #
+        self._boot_control = typing.cast(
+            BootControllerProtocol, mocker.MagicMock(spec=BootControllerProtocol)
+        )
+
+        # ------ mock create_standby ------ #
+        self._create_standby = typing.cast(
+            StandbySlotCreatorProtocol,
+            mocker.MagicMock(spec=StandbySlotCreatorProtocol),
+        )
+        self._create_standby_cls = mocker.MagicMock(return_value=self._create_standby)
+
+        # ------ mock otaclient cfg ------ #
+        _cfg = BaseConfig()
+        _cfg.MOUNT_POINT = str(tmp_path / "mnt")  # type: ignore
+        _cfg.RUN_DIR = str(tmp_path)  # type: ignore
+        monkeypatch.setattr(f"{cfg.OTACLIENT_MODULE_PATH}.cfg", _cfg)
+        monkeypatch.setattr(f"{cfg.OTAMETA_MODULE_PATH}.cfg", _cfg)
+
+        # ------ mock stats collector ------ #
+        mocker.patch(
+            f"{cfg.OTACLIENT_MODULE_PATH}.OTAUpdateStatsCollector", mocker.MagicMock()
+        )
+
+        # NOTE: downloader shutdown waits for the stats collector's polling round
+        monkeypatch.setattr(
+            downloader.Downloader, "DOWNLOAD_STAT_COLLECT_INTERVAL", 0.01
+        )
+
+    @pytest.mark.parametrize(
+        "injected_error, expected_ota_error",
+        (
+            (
+                downloader.HashVerificaitonError("url", "dst"),
+                MetadataJWTVerficationFailed,
+            ),
+            (
+                downloader.DestinationNotAvailableError("url", "dst"),
+                OTAErrorUnrecoverable,
+            ),
+            (downloader.UnhandledHTTPError("url", "dst"), OTAMetaDownloadFailed),
+        ),
+    )
+    def test_OTAUpdater_metadata_download_failed(
+        self,
+        mocker: pytest_mock.MockerFixture,
+        monkeypatch: pytest.MonkeyPatch,
+        injected_error: Exception,
+        expected_ota_error: type,
+    ):
+        """OTA update should fail at the very first download(metadata.jwt)
+        with the error injected directly into the downloader."""
+        _download_task = mocker.MagicMock(side_effect=injected_error)
+        monkeypatch.setattr(downloader.Downloader, "_download_task", _download_task)
+
+        _updater = _OTAUpdater(
+            boot_controller=self._boot_control,
+            create_standby_cls=self._create_standby_cls,
+            proxy=None,
+            control_flags=mocker.MagicMock(spec=OTAClientControlFlags),
+        )
+
+        with pytest.raises(expected_ota_error):
+            _updater.execute(
+                version=cfg.UPDATE_VERSION,
+                raw_url_base=cfg.OTA_IMAGE_URL,
+                cookies_json=UPDATE_COOKIES_JSON,
+            )
+        _download_task.assert_called_once()
+        self._boot_control.pre_update.assert_not_called()
+        self._boot_control.on_operation_failure.assert_called_once()
+        self._create_standby.create_standby_slot.assert_not_called()
+
+
 class Test_OTAClient:
     """Testing on OTAClient workflow."""
 
@@ -211,7 +336,6 @@ class Test_OTAClient:
     )
     MOCKED_STATUS_PROGRESS_V1 = MOCKED_STATUS_PROGRESS.convert_to_v1_StatusProgress()
 
-    UPDATE_COOKIES_JSON = r'{"test": "my-cookie"}'
     OTA_IMAGE_URL = "url"
     MY_ECU_ID = "autoware"
 
@@ -257,7 +381,7 @@ class Test_OTAClient:
         self.ota_client.update(
             self.UPDATE_FIRMWARE_VERSION,
             self.OTA_IMAGE_URL,
-            self.UPDATE_COOKIES_JSON,
+            UPDATE_COOKIES_JSON,
         )
 
         # --- assert on update finished(before reboot) --- #
@@ -265,7 +389,7 @@ class Test_OTAClient:
         self.ota_updater.execute.assert_called_once_with(
             self.UPDATE_FIRMWARE_VERSION,
             self.OTA_IMAGE_URL,
-            self.UPDATE_COOKIES_JSON,
+            UPDATE_COOKIES_JSON,
         )
         self.ota_lock.release.assert_called_once()
         assert (
@@ -282,7 +406,7 @@ class Test_OTAClient:
         self.ota_client.update(
             self.UPDATE_FIRMWARE_VERSION,
             self.OTA_IMAGE_URL,
-            self.UPDATE_COOKIES_JSON,
+            UPDATE_COOKIES_JSON,
         )
 
         # --- assertion on interrupted OTA update --- #
@@ -290,7 +414,7 @@ class Test_OTAClient:
         self.ota_updater.execute.assert_called_once_with(
             self.UPDATE_FIRMWARE_VERSION,
             self.OTA_IMAGE_URL,
-            self.UPDATE_COOKIES_JSON,
+            UPDATE_COOKIES_JSON,
         )
         self.ota_lock.release.assert_called_once()
 
@@ -365,10 +489,26 @@ class TestOTAServicer:
         available_ecu_ids=["my_ecu_id"],
         secondaries=[],
     )
+    WAIT_TIMEOUT = 3  # seconds
+
+    @pytest.fixture(scope="class")
+    def executor(self):
+        # NOTE: the executor is shared by all tests in this class, every test
+        #       should ensure its dispatched operation finished before returning.
+        _executor = ThreadPoolExecutor()
+        try:
+            yield _executor
+        finally:
+            _executor.shutdown(wait=False)
 
     @pytest.fixture(autouse=True)
-    async def mock_setup(self, mocker: pytest_mock.MockerFixture):
-        self._executor = ThreadPoolExecutor()
+    async def mock_setup(
+        self,
+        executor: ThreadPoolExecutor,
+        mocker: pytest_mock.MockerFixture,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        self._executor = executor
         self.otaclient = mocker.MagicMock(spec=OTAClient)
         self.otaclient_cls = mocker.MagicMock(return_value=self.otaclient)
         self.standby_slot_creator_cls = mocker.MagicMock()
@@ -378,7 +518,11 @@ class TestOTAServicer:
         #
         # ------ patching ------
         #
-        mocker.patch(f"{cfg.OTACLIENT_MODULE_PATH}.OTAClient", self.otaclient_cls)
+        # NOTE: use monkeypatch for patches with explicitly given replacement,
+        #       mocker.patch is only used when we need it to create the mock.
+        monkeypatch.setattr(
+            f"{cfg.OTACLIENT_MODULE_PATH}.OTAClient", self.otaclient_cls
+        )
         mocker.patch(
             f"{cfg.OTACLIENT_MODULE_PATH}.get_boot_controller",
             return_value=mocker.MagicMock(return_value=self.boot_controller),
@@ -387,7 +531,7 @@ class TestOTAServicer:
             f"{cfg.OTACLIENT_MODULE_PATH}.get_standby_slot_creator",
             return_value=self.standby_slot_creator_cls,
         )
-        mocker.patch(f"{cfg.OTACLIENT_MODULE_PATH}.ecu_info", self.ECU_INFO)
+        monkeypatch.setattr(f"{cfg.OTACLIENT_MODULE_PATH}.ecu_info", self.ECU_INFO)
 
         #
         # ------ start OTAServicer instance ------
@@ -400,11 +544,6 @@ class TestOTAServicer:
             proxy=self.local_use_proxy,
         )
 
-        try:
-            yield
-        finally:
-            self._executor.shutdown(wait=False)
-
     def test_stub_initializing(self):
         #
         # ------ assertion ------
@@ -422,36 +561,56 @@ class TestOTAServicer:
         assert self.otaclient_stub.last_operation is None
         assert self.otaclient_stub.local_used_proxy_url is self.local_use_proxy
 
-    async def test_dispatch_update(self):
-        update_request_ecu = wrapper.UpdateRequestEcu(
-            ecu_id=self.ECU_INFO.ecu_id,
-            version="version",
-            url="url",
-            cookies="cookies",
-        )
-        # patch otaclient's update method
-        _updating_event = threading.Event()
+    async def _dispatch_and_finish(
+        self, dispatch, request, mocked_otaclient_op, expected_last_operation
+    ):
+        """Dispatch an OTA operation that blocks until being released, then
+        check the OTAServicer's state during and after the operation."""
+        _op_started_event = asyncio.Event()
+        _op_finish_event = threading.Event()
+        _loop = asyncio.get_running_loop()
 
-        def _updating(*args, **kwargs):
-            """Simulating update progress."""
-            _updating_event.wait()
+        def _op(*args, **kwargs):
+            """Simulating update/rollback progress."""
+            _loop.call_soon_threadsafe(_op_started_event.set)
+            _op_finish_event.wait()
 
-        self.otaclient.update.side_effect = _updating
+        mocked_otaclient_op.side_effect = _op
 
-        # dispatch update
-        await self.otaclient_stub.dispatch_update(update_request_ecu)
-        await asyncio.sleep(0.1)  # wait for inner async closure to run
+        # dispatch the operation
+        await dispatch(request)
+        # wait for inner async closure to actually start the operation
+        await asyncio.wait_for(_op_started_event.wait(), timeout=self.WAIT_TIMEOUT)
 
-        assert self.otaclient_stub.last_operation is wrapper.StatusOta.UPDATING
+        assert self.otaclient_stub.last_operation is expected_last_operation
         assert self.otaclient_stub.is_busy
         # test ota update/rollback exclusive lock,
-        resp = await self.otaclient_stub.dispatch_update(update_request_ecu)
+        resp = await dispatch(request)
         assert resp.result == wrapper.FailureType.RECOVERABLE
 
-        # finish up update
-        _updating_event.set()
-        await asyncio.sleep(0.1)  # wait for update task return
+        # finish up the operation
+        _op_finish_event.set()
+
+        async def _wait_op_finished():
+            while self.otaclient_stub.is_busy:
+                await asyncio.sleep(0.01)
+
+        await asyncio.wait_for(_wait_op_finished(), timeout=self.WAIT_TIMEOUT)
         assert self.otaclient_stub.last_operation is None
+
+    async def test_dispatch_update(self):
+        update_request_ecu = wrapper.UpdateRequestEcu(
+            ecu_id=self.ECU_INFO.ecu_id,
+            version="version",
+            url="url",
+            cookies="cookies",
+        )
+        await self._dispatch_and_finish(
+            self.otaclient_stub.dispatch_update,
+            update_request_ecu,
+            self.otaclient.update,
+            wrapper.StatusOta.UPDATING,
+        )
         self.otaclient.update.assert_called_once_with(
             update_request_ecu.version,
             update_request_ecu.url,
@@ -459,29 +618,12 @@ class TestOTAServicer:
         )
 
     async def test_dispatch_rollback(self):
-        # patch otaclient's rollback method
-        _rollbacking_event = threading.Event()
-
-        def _rollbacking(*args, **kwargs):
-            """Simulating rollback progress."""
-            _rollbacking_event.wait()
-
-        self.otaclient.rollback.side_effect = _rollbacking
-
-        # dispatch rollback
-        await self.otaclient_stub.dispatch_rollback(wrapper.RollbackRequestEcu())
-        await asyncio.sleep(0.1)  # wait for inner async closure to run
-
-        assert self.otaclient_stub.last_operation is wrapper.StatusOta.ROLLBACKING
-        assert self.otaclient_stub.is_busy
-        # test ota update/rollback exclusive lock,
-        resp = await self.otaclient_stub.dispatch_rollback(wrapper.RollbackRequestEcu())
-        assert resp.result == wrapper.FailureType.RECOVERABLE
-
-        # finish up rollback
-        _rollbacking_event.set()
-        await asyncio.sleep(0.1)  # wait for rollback task return
-        assert self.otaclient_stub.last_operation is None
+        await self._dispatch_and_finish(
+            self.otaclient_stub.dispatch_rollback,
+            wrapper.RollbackRequestEcu(),
+            self.otaclient.rollback,
+            wrapper.StatusOta.ROLLBACKING,
+        )
         self.otaclient.rollback.assert_called_once()
 
     async def test_get_status(self):
@@ -21,6 +21,9 @@ from otaclient.app.ota_client_call import ECUNoResponse, OtaClientCall
 from otaclient.app.proto import v2, v2_grpc, wrapper
 from tests.utils import compare_message
 
+# NOTE: the dummy otaclient grpc server listens on the fixed otaclient port
+pytestmark = pytest.mark.xdist_group("otaclient_grpc_server")
+
 
 class _DummyOTAClientService(v2_grpc.OtaClientServiceServicer):
     DUMMY_STATUS = v2.StatusResponse(
@@ -27,6 +27,9 @@ from otaclient.configs.ecu_info import ECUInfo
 from tests.conftest import cfg
 from tests.utils import compare_message
 
+# NOTE: the otaclient grpc server listens on the fixed otaclient port
+pytestmark = pytest.mark.xdist_group("otaclient_grpc_server")
+
 
 class _MockedOTAClientServiceStub:
     MY_ECU_ID = "autoware"
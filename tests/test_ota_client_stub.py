@@ -18,13 +18,14 @@ import asyncio
 import logging
 import pytest
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack
 from pathlib import Path
 from typing import Any, Dict, List, Set
+from unittest.mock import Mock
 
 from pytest_mock import MockerFixture
 
 from otaclient.app.ota_client import OTAServicer
-from otaclient.app.ota_client_call import OtaClientCall
 from otaclient.app.ota_client_stub import (
     ECUStatusStorage,
     OTAClientServiceStub,
@@ -41,6 +42,9 @@ from tests.conftest import cfg
 
 logger = logging.getLogger(__name__)
 
+# NOTE: the launched otaproxy listens on the fixed port 8082
+pytestmark = pytest.mark.xdist_group("otaproxy_listen_port")
+
 
 ECU_INFO_YAML = """\
 format_vesrion: 1
@@ -68,16 +72,18 @@ local_ota_proxy_listen_port: 8082
 """
 
 
-@pytest.fixture
-def ecu_info_fixture(tmp_path: Path) -> ECUInfo:
-    _yaml_f = tmp_path / "ecu_info.yaml"
+# NOTE: ECUInfo and ProxyInfo are frozen, so the parsed instances
+#       can be safely shared by all the tests in this module.
+@pytest.fixture(scope="module")
+def ecu_info_fixture(tmp_path_factory: pytest.TempPathFactory) -> ECUInfo:
+    _yaml_f = tmp_path_factory.mktemp("ecu_info") / "ecu_info.yaml"
     _yaml_f.write_text(ECU_INFO_YAML)
     return parse_ecu_info(_yaml_f)
 
 
-@pytest.fixture
-def proxy_info_fixture(tmp_path: Path) -> ProxyInfo:
-    _yaml_f = tmp_path / "proxy_info.yaml"
+@pytest.fixture(scope="module")
+def proxy_info_fixture(tmp_path_factory: pytest.TempPathFactory) -> ProxyInfo:
+    _yaml_f = tmp_path_factory.mktemp("proxy_info") / "proxy_info.yaml"
     _yaml_f.write_text(PROXY_INFO_YAML)
     return parse_proxy_info(_yaml_f)
 
@@ -99,6 +105,13 @@ class _DummyOTAProxyContext(OTAProxyContextProto):
         return
 
 
+class _DummyECUTracker:
+    """ECU tracker that does nothing, ECU status is fed by the tests directly."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        return
+
+
 class TestOTAProxyLauncher:
     @pytest.fixture(autouse=True)
     async def mock_setup(
@@ -120,17 +133,18 @@ class TestOTAProxyLauncher:
             proxy_server_cfg,
         )
 
-        # init launcher inst
-        threadpool = ThreadPoolExecutor()
-        self.otaproxy_launcher = OTAProxyLauncher(
-            executor=threadpool,
-            subprocess_ctx=_DummyOTAProxyContext(str(self.sentinel_file)),
-        )
+        async with AsyncExitStack() as stack:
+            # init launcher inst
+            threadpool = stack.enter_context(ThreadPoolExecutor())
+            self.otaproxy_launcher = OTAProxyLauncher(
+                executor=threadpool,
+                subprocess_ctx=_DummyOTAProxyContext(str(self.sentinel_file)),
+            )
+            # NOTE: ensure the otaproxy subprocess is stopped even if the test
+            #       fails halfway, before the threadpool it depends on shutdowns.
+            stack.push_async_callback(self.otaproxy_launcher.stop)
 
-        try:
             yield
-        finally:
-            threadpool.shutdown()
 
     async def test_start_stop(self):
         # startup
@@ -156,8 +170,8 @@ class TestOTAProxyLauncher:
 
 
 class TestECUStatusStorage:
-    PROPERTY_REFRESH_INTERVAL_FOR_TEST = 1
-    SAFE_INTERVAL_FOR_PROPERTY_UPDATE = 1.2
+    PROPERTY_REFRESH_INTERVAL_FOR_TEST = 0.1
+    SAFE_INTERVAL_FOR_PROPERTY_UPDATE = 0.3
 
     @pytest.fixture(autouse=True)
     async def setup_test(self, mocker: MockerFixture, ecu_info_fixture):
@@ -170,7 +184,9 @@ class TestECUStatusStorage:
         # init and setup the ecu_storage
         self.ecu_storage = ECUStatusStorage()
         # NOTE: decrease the interval for faster testing
+        #       (ACTIVE_POLLING_INTERVAL is used before properties are initialized)
         self.ecu_storage.PROPERTY_REFRESH_INTERVAL = self.PROPERTY_REFRESH_INTERVAL_FOR_TEST  # type: ignore
+        self.ecu_storage.ACTIVE_POLLING_INTERVAL = self.PROPERTY_REFRESH_INTERVAL_FOR_TEST  # type: ignore
 
         try:
             yield
@@ -178,6 +194,16 @@ class TestECUStatusStorage:
             self.ecu_storage._debug_properties_update_shutdown_event.set()
             await asyncio.sleep(self.SAFE_INTERVAL_FOR_PROPERTY_UPDATE)
 
+    async def _feed_ecus_status(
+        self,
+        local_ecu_status: wrapper.StatusResponseEcuV2,
+        sub_ecus_status: List[wrapper.StatusResponse],
+    ):
+        """Feed the local ECU's and sub ECUs' status reports to the ecu_storage."""
+        await self.ecu_storage.update_from_local_ecu(local_ecu_status)
+        for ecu_status_report in sub_ecus_status:
+            await self.ecu_storage.update_from_child_ecu(ecu_status_report)
+
     @pytest.mark.parametrize(
         "local_ecu_status,sub_ecus_status,expected",
         (
@@ -422,9 +448,7 @@ class TestECUStatusStorage:
         expected: wrapper.StatusResponse,
     ):
         # --- prepare --- #
-        await self.ecu_storage.update_from_local_ecu(local_ecu_status)
-        for ecu_status_report in sub_ecus_status:
-            await self.ecu_storage.update_from_child_ecu(ecu_status_report)
+        await self._feed_ecus_status(local_ecu_status, sub_ecus_status)
 
         # --- execution --- #
         exported = await self.ecu_storage.export()
@@ -538,9 +562,7 @@ class TestECUStatusStorage:
         properties_dict: Dict[str, Any],
     ):
         # --- prepare --- #
-        await self.ecu_storage.update_from_local_ecu(local_ecu_status)
-        for ecu_status_report in sub_ecus_status:
-            await self.ecu_storage.update_from_child_ecu(ecu_status_report)
+        await self._feed_ecus_status(local_ecu_status, sub_ecus_status)
         await asyncio.sleep(
             self.SAFE_INTERVAL_FOR_PROPERTY_UPDATE
         )  # wait for status report generation
@@ -664,9 +686,7 @@ class TestECUStatusStorage:
         properties_dict: Dict[str, Any],
     ):
         # --- prepare --- #
-        await self.ecu_storage.update_from_local_ecu(local_ecu_status)
-        for ecu_status_report in sub_ecus_status:
-            await self.ecu_storage.update_from_child_ecu(ecu_status_report)
+        await self._feed_ecus_status(local_ecu_status, sub_ecus_status)
         await asyncio.sleep(
             self.SAFE_INTERVAL_FOR_PROPERTY_UPDATE
         )  # wait for status report generation
@@ -686,7 +706,7 @@ class TestECUStatusStorage:
 
     async def test_polling_waiter_switching_from_idling_to_active(self):
         """Waiter should immediately return if active_ota_update_present is set."""
-        _sleep_time, _mocked_interval = 3, 60
+        _sleep_time, _mocked_interval = 0.3, 60
         self.ecu_storage.IDLE_POLLING_INTERVAL = _mocked_interval  # type: ignore
 
         async def _event_setter():
@@ -705,8 +725,8 @@ class TestECUStatusStorage:
 
 
 class TestOTAClientServiceStub:
-    POLLING_INTERVAL = 1
-    ENSURE_NEXT_CHECKING_ROUND = 1.2
+    POLLING_INTERVAL = 0.1
+    ENSURE_NEXT_CHECKING_ROUND = 0.3
 
     @staticmethod
     async def _subecu_accept_update_request(ecu_id, *args, **kwargs):
@@ -722,8 +742,6 @@ class TestOTAClientServiceStub:
     async def setup_test(
         self, mocker: MockerFixture, ecu_info_fixture, proxy_info_fixture
     ):
-        threadpool = ThreadPoolExecutor()
-
         # ------ mock and patch ecu_info ------ #
         self.ecu_info = ecu_info = ecu_info_fixture
         mocker.patch(f"{cfg.OTACLIENT_STUB_MODULE_PATH}.ecu_info", ecu_info)
@@ -742,37 +760,27 @@ class TestOTAClientServiceStub:
 
         # --- mocker --- #
         self.otaclient_wrapper = mocker.MagicMock(spec=OTAServicer)
-        self.ecu_status_tracker = mocker.MagicMock()
         self.otaproxy_launcher = mocker.MagicMock(spec=OTAProxyLauncher)
+        self.otaproxy_launcher.is_running = False
         # mock OTAClientCall, make update_call return success on any update dispatches to subECUs
-        self.otaclient_call = mocker.AsyncMock(spec=OtaClientCall)
+        # NOTE: update_call is the only API used and it is explicitly mocked below,
+        #       so no spec is needed for this mock.
+        self.otaclient_call = mocker.AsyncMock()
         self.otaclient_call.update_call = mocker.AsyncMock(
             wraps=self._subecu_accept_update_request
         )
 
-        # ------ mock and patch proxy_info ------ #
-        self.proxy_info = proxy_info = proxy_info_fixture
-        mocker.patch(f"{cfg.OTACLIENT_STUB_MODULE_PATH}.proxy_info", proxy_info)
-
         # --- patching and mocking --- #
-        mocker.patch(
-            f"{cfg.OTACLIENT_STUB_MODULE_PATH}.ECUStatusStorage",
-            mocker.MagicMock(return_value=self.ecu_storage),
-        )
-        mocker.patch(
-            f"{cfg.OTACLIENT_STUB_MODULE_PATH}.OTAServicer",
-            mocker.MagicMock(return_value=self.otaclient_wrapper),
-        )
-        mocker.patch(
-            f"{cfg.OTACLIENT_STUB_MODULE_PATH}._ECUTracker",
-            mocker.MagicMock(return_value=self.ecu_status_tracker),
-        )
-        mocker.patch(
-            f"{cfg.OTACLIENT_STUB_MODULE_PATH}.OTAProxyLauncher",
-            mocker.MagicMock(return_value=self.otaproxy_launcher),
-        )
-        mocker.patch(
-            f"{cfg.OTACLIENT_STUB_MODULE_PATH}.OtaClientCall", self.otaclient_call
+        # NOTE: ecu_info is patched above as it is required by ECUStatusStorage.
+        self.proxy_info = proxy_info_fixture
+        mocker.patch.multiple(
+            cfg.OTACLIENT_STUB_MODULE_PATH,
+            proxy_info=self.proxy_info,
+            ECUStatusStorage=mocker.MagicMock(return_value=self.ecu_storage),
+            OTAServicer=mocker.MagicMock(return_value=self.otaclient_wrapper),
+            _ECUTracker=_DummyECUTracker,
+            OTAProxyLauncher=mocker.MagicMock(return_value=self.otaproxy_launcher),
+            OtaClientCall=self.otaclient_call,
         )
 
         # --- start the OTAClientServiceStub --- #
@@ -782,9 +790,22 @@ class TestOTAClientServiceStub:
             yield
         finally:
             self.otaclient_service_stub._debug_status_checking_shutdown_event.set()
-            threadpool.shutdown()
             await asyncio.sleep(self.ENSURE_NEXT_CHECKING_ROUND)  # ensure shutdown
 
+    async def _wait_for_called(self, mocked: Mock, timeout: float):
+        """Wait until <mocked> is called for the first time.
+
+        NOTE: the lifecycle managing task checks on every polling round, and the
+              mocked launcher doesn't change its state by itself, so the state
+              must be changed right after the first call is observed.
+        """
+
+        async def _waiter():
+            while not mocked.called:
+                await asyncio.sleep(self.POLLING_INTERVAL / 10)
+
+        await asyncio.wait_for(_waiter(), timeout=timeout)
+
     async def test__otaproxy_lifecycle_managing(self):
         """
         otaproxy startup/shutdown is only controlled by any_requires_network
@@ -798,7 +819,9 @@ class TestOTAClientServiceStub:
         # --- wait for execution --- #
         # wait for _otaproxy_lifecycle_managing to launch
         # the otaproxy on overall ecu status changed
-        await asyncio.sleep(self.ENSURE_NEXT_CHECKING_ROUND)
+        await self._wait_for_called(
+            self.otaproxy_launcher.start, self.ENSURE_NEXT_CHECKING_ROUND
+        )
 
         # --- assertion --- #
         self.otaproxy_launcher.start.assert_called_once()
@@ -806,14 +829,18 @@ class TestOTAClientServiceStub:
         # ------ otaproxy shutdown ------ #
         # --- prepartion --- #
         # set the OTAPROXY_SHUTDOWN_DELAY to allow start/stop in single test
-        self.otaclient_service_stub.OTAPROXY_SHUTDOWN_DELAY = 1  # type: ignore
+        self.otaclient_service_stub.OTAPROXY_SHUTDOWN_DELAY = 0  # type: ignore
         self.otaproxy_launcher.is_running = True
         self.ecu_storage.any_requires_network = False
 
         # --- wait for execution --- #
         # wait for _otaproxy_lifecycle_managing to shutdown
         # the otaproxy on overall ecu status changed
-        await asyncio.sleep(self.ENSURE_NEXT_CHECKING_ROUND)
+        # NOTE: otaproxy launching timestamp is in seconds, so at most
+        #       1 more second is needed for the shutdown delay to expire.
+        await self._wait_for_called(
+            self.otaproxy_launcher.stop, self.ENSURE_NEXT_CHECKING_ROUND + 1
+        )
 
         # --- assertion --- #
         self.otaproxy_launcher.stop.assert_called_once()
@@ -823,7 +850,9 @@ class TestOTAClientServiceStub:
         self.ecu_storage.any_requires_network = False
         self.ecu_storage.all_success = True
         self.otaproxy_launcher.is_running = False
-        await asyncio.sleep(self.ENSURE_NEXT_CHECKING_ROUND)
+        await self._wait_for_called(
+            self.otaproxy_launcher.cleanup_cache_dir, self.ENSURE_NEXT_CHECKING_ROUND
+        )
 
         # --- assertion --- #
         self.otaproxy_launcher.cleanup_cache_dir.assert_called_once()
@@ -923,6 +952,39 @@ class TestOTAClientServiceStub:
             update_target_ids
         )
 
+    async def test_update_subecus_dispatched_concurrently(self):
+        _subecus_id = {"p1", "p2"}
+        _dispatched_subecus_id: Set[str] = set()
+        _all_dispatched = asyncio.Event()
+
+        async def _wait_for_all_subecus_dispatched(ecu_id, *args, **kwargs):
+            _dispatched_subecus_id.add(ecu_id)
+            if _dispatched_subecus_id == _subecus_id:
+                _all_dispatched.set()
+            # NOTE: if the update requests are dispatched to subECUs one by one,
+            #       the first dispatched request will never see the others.
+            await asyncio.wait_for(
+                _all_dispatched.wait(), timeout=self.ENSURE_NEXT_CHECKING_ROUND
+            )
+            return await self._subecu_accept_update_request(ecu_id)
+
+        self.otaclient_call.update_call.side_effect = _wait_for_all_subecus_dispatched
+        update_request = wrapper.UpdateRequest(
+            ecu=[
+                wrapper.UpdateRequestEcu(
+                    ecu_id=_ecu_id, version="789.x", url="url", cookies="cookies"
+                )
+                for _ecu_id in sorted(_subecus_id)
+            ]
+        )
+
+        # --- execution --- #
+        resp = await self.otaclient_service_stub.update(update_request)
+
+        # --- assertion --- #
+        assert resp.ecus_acked_update == _subecus_id
+        assert self.otaclient_call.update_call.await_count == len(_subecus_id)
+
     async def test_update_local_ecu_busy(self):
         # --- preparation --- #
         self.otaclient_wrapper.dispatch_update.return_value = wrapper.UpdateResponseEcu(
@@ -20,8 +20,10 @@ from dataclasses import dataclass
 from os import urandom
 from pathlib import Path
 from typing import Any, Dict, Tuple
+from pytest_mock import MockerFixture
+from otaclient.ota_proxy.db import AIO_OTACacheDBProxy
 from otaclient.ota_proxy.ota_cache import CacheMeta, OTACacheDB
-from otaclient.ota_proxy.orm import NULL_TYPE
+from otaclient.ota_proxy.orm import NULL_TYPE, ColumnDescriptor
 from otaclient.ota_proxy import config as cfg
 from otaclient.ota_proxy.utils import url_based_hash
 
@@ -173,6 +175,29 @@ class TestORM:
 
 
 class TestOTACacheDB:
+    @pytest.fixture(
+        autouse=True,
+        params=(
+            pytest.param(
+                True,
+                marks=pytest.mark.skipif(
+                    sqlite3.sqlite_version_info < (3, 35, 0),
+                    reason="RETURNING clause requires sqlite3 >= 3.35",
+                ),
+            ),
+            False,
+        ),
+        ids=("returning", "no_returning"),
+    )
+    def sqlite_returning_supported(
+        self, request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch
+    ):
+        """Test both the RETURNING clause path and the fallback path."""
+        monkeypatch.setattr(
+            "otaclient.ota_proxy.db.SQLITE_RETURNING_SUPPORTED", request.param
+        )
+        return request.param
+
     @pytest.fixture(autouse=True)
     def prepare_db(self, tmp_path: Path):
         self.db_f = db_f = tmp_path / "db_f"
@@ -214,6 +239,16 @@ class TestOTACacheDB:
             # should have the same order as insertion
             assert _all == self.entries
 
+    def test_bulk_insert(self, tmp_path: Path):
+        db_f = tmp_path / "db_f2"
+        OTACacheDB.init_db_file(db_f)
+        entries_num = len(self.entries)
+        with OTACacheDB(db_f) as db_conn:
+            assert db_conn.bulk_insert(iter(self.entries), chunk_size=7) == entries_num
+        # check the insertion with another connection
+        with OTACacheDB(db_f) as db_conn:
+            assert db_conn.lookup_all() == self.entries
+
     def test_db_corruption(self, tmp_path: Path):
         test_db_f = tmp_path / "corrupted_db_f"
         # intensionally create corrupted db file
@@ -227,6 +262,33 @@ class TestOTACacheDB:
 
         assert not OTACacheDB.check_db_file(test_db_f)
 
+    def test_proxy_check_db(self, mocker: MockerFixture):
+        """
+        db file validation can be skipped if the caller has already validated it
+        """
+        _check_db_file = mocker.spy(OTACacheDB, "check_db_file")
+        AIO_OTACacheDBProxy(self.db_f, check_db=False).close()
+        _check_db_file.assert_not_called()
+        AIO_OTACacheDBProxy(self.db_f).close()
+        _check_db_file.assert_called_once()
+
+    def test_index_usage(self):
+        with sqlite3.connect(self.db_f) as con:
+            assert OTACacheDB._verify_index_usage(con)
+
+    def test_index_usage_diagnostic_only(self, tmp_path: Path):
+        """
+        failing the index usage check should not invalidate the db file
+        """
+        db_f = tmp_path / "db_f_without_index"
+        with sqlite3.connect(db_f) as con:
+            con.execute(CacheMeta.get_create_table_stmt(OTACacheDB.TABLE_NAME))
+            assert not OTACacheDB._verify_index_usage(con)
+        assert OTACacheDB.check_db_file(db_f)
+        # failing to get the query plan is logged instead of raised
+        with sqlite3.connect(tmp_path / "empty_db_f") as con:
+            assert not OTACacheDB._verify_index_usage(con)
+
     def test_lookup_all(self):
         """
         NOTE: the timestamp update is only executed at lookup method
@@ -242,9 +304,58 @@ class TestOTACacheDB:
         target = self.entries[-1]
         # lookup once to update last_acess
         checked_entry = self.conn.lookup_entry(CacheMeta.url, target.url)
-        assert checked_entry == target
+        assert checked_entry and checked_entry.file_sha256 == target.file_sha256
         checked_entry = self.conn.lookup_entry(CacheMeta.url, target.url)
         assert checked_entry and checked_entry.last_access > target.last_access
+        # except last_access, the entry should remain the same
+        checked_entry.last_access = target.last_access
+        assert checked_entry == target
+
+    def test_lookup_miss(self):
+        """
+        lookup an entry not in the database, nothing should be changed
+        """
+        assert self.conn.lookup_entry(CacheMeta.url, "not_cached_url") is None
+        assert self.conn.lookup_all() == self.entries
+
+    def test_lookup_without_write_lock(self, sqlite_returning_supported: bool):
+        """
+        without RETURNING support, lookup should not take the write lock on miss
+        """
+        if sqlite_returning_supported:
+            pytest.skip("lookup with RETURNING is always a write")
+
+        target = self.entries[-1]
+        # hold the write lock with another connection
+        with sqlite3.connect(self.db_f, isolation_level=None) as con:
+            con.execute("PRAGMA busy_timeout = 0;")
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                assert self.conn.lookup_entry(CacheMeta.url, "not_cached_url") is None
+            finally:
+                con.execute("ROLLBACK")
+        checked_entry = self.conn.lookup_entry(CacheMeta.url, target.url)
+        assert checked_entry and checked_entry.file_sha256 == target.file_sha256
+
+    def test_delete_in_batches(self, mocker: MockerFixture):
+        """
+        delete all entries by file_sha256 with small batch size
+        """
+        mocker.patch.object(OTACacheDB, "REMOVE_ENTRIES_BATCH_SIZE", 7)
+        assert self.conn.remove_entries(
+            CacheMeta.file_sha256, *[entry.file_sha256 for entry in self.entries]
+        ) == len(self.entries)
+        assert not self.conn.lookup_all()
+
+    def test_invalid_field(self):
+        """
+        field descriptor not belonging to CacheMeta should be rejected
+        """
+        invalid_fd = ColumnDescriptor(str, "TEXT")
+        target = self.entries[-1]
+        assert self.conn.lookup_entry(invalid_fd, target.url) is None
+        assert self.conn.remove_entries(invalid_fd, target.url) == 0
+        assert len(self.conn.lookup_all()) == len(self.entries)
 
     def test_delete(self):
         """
@@ -259,3 +370,24 @@ class TestOTACacheDB:
             len(self.conn.lookup_all())
             == len(self.entries) - cfg.BUCKET_FILE_SIZE_DICT[bucket_size]
         )
+
+    def test_rotate_cache(self):
+        """
+        rotate the 256KiB bucket, which has 8 entries in it
+        """
+        bucket_size = 256 * 1024
+        bucket_entries_num = cfg.BUCKET_FILE_SIZE_DICT[bucket_size]
+        bucket_hashes = {
+            entry.file_sha256
+            for entry in self.entries
+            if entry.bucket_idx == bucket_size
+        }
+        # not enough entries in the bucket, nothing should be deleted
+        assert self.conn.rotate_cache(bucket_size, bucket_entries_num + 1) is None
+        assert len(self.conn.lookup_all()) == len(self.entries)
+
+        rotated = self.conn.rotate_cache(bucket_size, bucket_entries_num - 1)
+        assert rotated and len(rotated) == bucket_entries_num - 1
+        assert set(rotated) <= bucket_hashes
+        assert self.conn.rotate_cache(bucket_size, 2) is None
+        assert len(self.conn.lookup_all()) == len(self.entries) - len(rotated)
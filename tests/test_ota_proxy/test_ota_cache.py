@@ -105,6 +105,7 @@ class TestOngoingCachingRegister:
 
     URL = "common_url"
     WORKS_NUM = 128
+    WAIT_TIMEOUT = 10  # seconds
 
     @pytest.fixture(autouse=True)
     def setup_test(self, tmp_path: Path):
@@ -177,7 +178,10 @@ class TestOngoingCachingRegister:
         # start all the worker
         self.sync_event.set()
         logger.info("all workers start to subscribe to the register")
-        await self._wait_for_registeration_finish()  # wait for all workers finish subscribing
+        # wait for all workers finish subscribing
+        await asyncio.wait_for(
+            self._wait_for_registeration_finish(), timeout=self.WAIT_TIMEOUT
+        )
         self.writer_done_event.set()  # writer finished
 
         ###### check the test result ######
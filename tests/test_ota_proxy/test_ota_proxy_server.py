@@ -29,7 +29,7 @@ from typing import List
 from otaclient.app.proto.wrapper import RegularInf
 from otaclient.app.ota_metadata import parse_regulars_from_txt
 from otaclient.ota_proxy.utils import url_based_hash
-from tests.conftest import ThreadpoolExecutorFixtureMixin, cfg
+from tests.conftest import cfg
 
 logger = logging.getLogger(__name__)
 
@@ -53,8 +53,7 @@ async def _start_uvicorn_server(server: uvicorn.Server):
     await server.startup()
 
 
-class TestOTAProxyServer(ThreadpoolExecutorFixtureMixin):
-    THTREADPOOL_EXECUTOR_PATCH_PATH = f"{cfg.OTAPROXY_MODULE_PATH}.otacache"
+class TestOTAProxyServer:
     OTA_IMAGE_URL = f"http://{cfg.OTA_IMAGE_SERVER_ADDR}:{cfg.OTA_IMAGE_SERVER_PORT}"
     OTA_PROXY_URL = f"http://{cfg.OTA_PROXY_SERVER_ADDR}:{cfg.OTA_PROXY_SERVER_PORT}"
     REGULARS_TXT_PATH = f"{cfg.OTA_IMAGE_DIR}/regulars.txt"
@@ -281,8 +280,7 @@ class TestOTAProxyServer(ThreadpoolExecutorFixtureMixin):
         assert len(list(self.ota_cache_dir.glob("tmp_*"))) == 0
 
 
-class TestOTAProxyServerWithoutCache(ThreadpoolExecutorFixtureMixin):
-    THTREADPOOL_EXECUTOR_PATCH_PATH = f"{cfg.OTAPROXY_MODULE_PATH}.otacache"
+class TestOTAProxyServerWithoutCache:
     OTA_IMAGE_URL = f"http://{cfg.OTA_IMAGE_SERVER_ADDR}:{cfg.OTA_IMAGE_SERVER_PORT}"
     OTA_PROXY_URL = f"http://{cfg.OTA_PROXY_SERVER_ADDR}:{cfg.OTA_PROXY_SERVER_PORT}"
     REGULARS_TXT_PATH = f"{cfg.OTA_IMAGE_DIR}/regulars.txt"
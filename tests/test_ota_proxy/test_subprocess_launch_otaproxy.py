@@ -13,12 +13,16 @@
 # limitations under the License.
 
 
+import pytest
 import time
 from functools import partial
 from pathlib import Path
 from typing import Any, Dict
 from otaclient.ota_proxy import subprocess_otaproxy_launcher, OTAProxyContextProto
 
+# NOTE: the launched otaproxy listens on the fixed port 8082
+pytestmark = pytest.mark.xdist_group("otaproxy_listen_port")
+
 
 class _DummyOTAProxyContext(OTAProxyContextProto):
     def __init__(self, sentinel) -> None:
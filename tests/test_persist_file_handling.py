@@ -15,6 +15,7 @@
 
 from __future__ import annotations
 import os
+import pytest
 import stat
 from pathlib import Path
 
@@ -297,7 +298,14 @@ crontab:x:2105:
     return src_passwd_file, dst_passwd_file, src_group_file, dst_group_file
 
 
-def test_copy_tree_src_dir(mocker, tmp_path):
+@pytest.fixture(scope="module")
+def passwd_group_files(tmp_path_factory: pytest.TempPathFactory):
+    """passwd and group files are only read by PersistFilesHandler, so they
+    are created once and shared by all the tests in this module."""
+    return create_passwd_group_files(tmp_path_factory.mktemp("passwd_group"))
+
+
+def test_copy_tree_src_dir(mocker, tmp_path, passwd_group_files):
     (
         dst,
         src,
@@ -320,7 +328,7 @@ def test_copy_tree_src_dir(mocker, tmp_path):
         dst_passwd_file,
         src_group_file,
         dst_group_file,
-    ) = create_passwd_group_files(tmp_path)
+    ) = passwd_group_files
 
     # NOTE: persist entry must be canonical and starts with /
     persist_entry = replace_root(B, src, "/")
@@ -385,7 +393,7 @@ def test_copy_tree_src_dir(mocker, tmp_path):
     assert not (dst / to_broken_b.relative_to(src)).is_symlink()
 
 
-def test_copy_tree_src_file(mocker, tmp_path):
+def test_copy_tree_src_file(mocker, tmp_path, passwd_group_files):
     (
         dst,
         src,
@@ -408,7 +416,7 @@ def test_copy_tree_src_file(mocker, tmp_path):
         dst_passwd_file,
         src_group_file,
         dst_group_file,
-    ) = create_passwd_group_files(tmp_path)
+    ) = passwd_group_files
 
     PersistFilesHandler(
         src_passwd_file=src_passwd_file,
@@ -462,7 +470,7 @@ def test_copy_tree_src_file(mocker, tmp_path):
     assert not (dst / C.relative_to(src)).is_symlink()
 
 
-def test_copy_tree_B_exists(mocker, tmp_path):
+def test_copy_tree_B_exists(mocker, tmp_path, passwd_group_files):
     (
         dst,
         src,
@@ -497,7 +505,7 @@ def test_copy_tree_B_exists(mocker, tmp_path):
         dst_passwd_file,
         src_group_file,
         dst_group_file,
-    ) = create_passwd_group_files(tmp_path)
+    ) = passwd_group_files
 
     PersistFilesHandler(
         src_passwd_file=src_passwd_file,
@@ -555,7 +563,7 @@ def test_copy_tree_B_exists(mocker, tmp_path):
     assert not (dst / to_broken_c.relative_to(src)).is_symlink()
 
 
-def test_copy_tree_with_symlink_overwrite(mocker, tmp_path):
+def test_copy_tree_with_symlink_overwrite(mocker, tmp_path, passwd_group_files):
     (
         dst,
         src,
@@ -578,7 +586,7 @@ def test_copy_tree_with_symlink_overwrite(mocker, tmp_path):
         dst_passwd_file,
         src_group_file,
         dst_group_file,
-    ) = create_passwd_group_files(tmp_path)
+    ) = passwd_group_files
 
     ct = PersistFilesHandler(
         src_passwd_file=src_passwd_file,
@@ -609,7 +617,7 @@ def test_copy_tree_with_symlink_overwrite(mocker, tmp_path):
     assert (dst / to_broken_a.relative_to(src)).is_symlink()
 
 
-def test_copy_tree_src_dir_dst_file(mocker, tmp_path):
+def test_copy_tree_src_dir_dst_file(mocker, tmp_path, passwd_group_files):
     (
         dst,
         src,
@@ -632,7 +640,7 @@ def test_copy_tree_src_dir_dst_file(mocker, tmp_path):
         dst_passwd_file,
         src_group_file,
         dst_group_file,
-    ) = create_passwd_group_files(tmp_path)
+    ) = passwd_group_files
 
     ct = PersistFilesHandler(
         src_passwd_file=src_passwd_file,
@@ -704,7 +712,7 @@ def test_copy_tree_src_dir_dst_file(mocker, tmp_path):
     assert not (dst / to_broken_b.relative_to(src)).is_symlink()
 
 
-def test_copy_tree_src_file_dst_dir(mocker, tmp_path):
+def test_copy_tree_src_file_dst_dir(mocker, tmp_path, passwd_group_files):
     (
         dst,
         src,
@@ -727,7 +735,7 @@ def test_copy_tree_src_file_dst_dir(mocker, tmp_path):
         dst_passwd_file,
         src_group_file,
         dst_group_file,
-    ) = create_passwd_group_files(tmp_path)
+    ) = passwd_group_files
 
     ct = PersistFilesHandler(
         src_passwd_file=src_passwd_file,
@@ -15,6 +15,8 @@
 
 import asyncio
 import os
+import shutil
+import socket
 import time
 import zstandard
 from google.protobuf.message import Message as _Message
@@ -81,6 +83,20 @@ def run_http_server(addr: str, port: int, *, directory: str):
         httpd.serve_forever()
 
 
+def wait_for_server(
+    addr: str, port: int, *, timeout: float = 10, interval: float = 0.05
+) -> bool:
+    """Wait until the server at <addr>:<port> starts accepting connections."""
+    _deadline = time.time() + timeout
+    while time.time() < _deadline:
+        try:
+            with socket.create_connection((addr, port), timeout=interval):
+                return True
+        except OSError:
+            time.sleep(interval)
+    return False
+
+
 def compare_dir(left: Path, right: Path):
     _a_glob = set(map(lambda x: x.relative_to(left), left.glob("**/*")))
     _b_glob = set(map(lambda x: x.relative_to(right), right.glob("**/*")))
@@ -185,6 +201,20 @@ class DummySubECU:
         return res
 
 
+def link_or_copy(src: Union[str, Path], dst_dir: Union[str, Path]) -> Path:
+    """Hardlink <src> into <dst_dir>, fallback to copy if hardlink is not possible.
+
+    NOTE: only use this for files that will not be modified afterward,
+          as the hardlinked file shares the same inode with <src>.
+    """
+    src, dst = Path(src), Path(dst_dir) / Path(src).name
+    try:
+        os.link(src, dst)
+    except OSError:  # i.e., cross-device link
+        shutil.copy(src, dst)
+    return dst
+
+
 def zstd_compress_file(src: Union[str, Path], dst: Union[str, Path]):
     cctx = zstandard.ZstdCompressor()
     with open(src, "rb") as src_f, open(dst, "wb") as dst_f:
@@ -13,27 +13,44 @@
 # limitations under the License.
 
 
+import os
 import yaml
+from functools import lru_cache
+from typing import Any, Dict, List
+
 from otaclient.app.ota_client_call import ECUNoResponse, OtaClientCall
 from otaclient.app.proto import wrapper
 from . import _logutil
 
 logger = _logutil.get_logger(__name__)
 
+# use the libyaml backed loader if available
+_YAMLLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
-def load_external_update_request(request_yaml_file: str) -> wrapper.UpdateRequest:
+
+@lru_cache(maxsize=32)
+def _load_request_yaml(request_yaml_file: str, _mtime: float) -> List[Dict[str, Any]]:
+    """Load and cache the request yaml file, <_mtime> invalidates the cache on change."""
     with open(request_yaml_file, "r") as f:
         try:
-            request_yaml = yaml.safe_load(f)
+            request_yaml = yaml.load(f, Loader=_YAMLLoader)
             assert isinstance(request_yaml, list), "expect update request to be a list"
         except Exception as e:
             logger.exception(f"invalid update request yaml: {e!r}")
             raise
 
         logger.info(f"load external request: {request_yaml!r}")
-        request = wrapper.UpdateRequest()
-        for request_ecu in request_yaml:
-            request.ecu.append(wrapper.UpdateRequestEcu(**request_ecu))
+        return request_yaml
+
+
+def load_external_update_request(request_yaml_file: str) -> wrapper.UpdateRequest:
+    request_yaml = _load_request_yaml(
+        request_yaml_file, os.path.getmtime(request_yaml_file)
+    )
+
+    request = wrapper.UpdateRequest()
+    for request_ecu in request_yaml:
+        request.ecu.append(wrapper.UpdateRequestEcu(**request_ecu))
     return request
 
 
@@ -60,12 +60,7 @@ class MiniOtaClientServiceV2(v2_grpc.OtaClientServiceServicer):
         logger.debug(f"{request=}")
 
         # return if not listed as target
-        found = False
-        for ecu in request.ecu:
-            if ecu.ecu_id == self.ecu_id:
-                found = True
-                break
-        if not found:
+        if not any(ecu.ecu_id == self.ecu_id for ecu in request.ecu):
             logger.debug(f"{self.ecu_id}, Update: not listed as update target, abort")
             return v2.UpdateResponse()
 